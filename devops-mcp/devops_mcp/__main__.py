@@ -19,12 +19,23 @@ Usage:
 
 import argparse
 import asyncio
-import json
+import contextlib
+import hashlib
+import hmac
+import inspect
 import os
 import logging
-from typing import Any, Optional
+import re
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import parse_qsl
+from typing import Any, Awaitable, Callable, Optional
 from datetime import datetime
 
+from pydantic import TypeAdapter
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -35,7 +46,7 @@ from mcp.types import (
 )
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger("devops-mcp")
 
 # Import tool modules
@@ -48,6 +59,8 @@ from .tools.slack_tools import SlackTools
 from .tools.skills_tools import SkillsTools
 from .tools.carbone_tools import CarboneTools
 from .tools.metabase_tools import MetabaseTools
+from .cache import TTLCache, MISS, make_key
+from .serialization import dumps, dumps_bytes, loads
 
 # Initialize server
 server = Server("devops-mcp")
@@ -63,8 +76,21 @@ skills = SkillsTools()
 carbone = CarboneTools()
 metabase = MetabaseTools()
 
-# Collect all tools
-ALL_TOOLS = {
+# Integrations reported by the config resource
+INTEGRATIONS = {
+    "azure": azure,
+    "supabase": supabase,
+    "github": github,
+    "vercel": vercel,
+    "n8n": n8n,
+    "slack": slack,
+}
+
+# Response cache for tools that declare a nonzero "cache_ttl"
+response_cache = TTLCache(max_entries=int(os.environ.get("MCP_CACHE_MAX_ENTRIES", "512")))
+
+# Collect all tools (read-only once assembled)
+ALL_TOOLS = MappingProxyType({
     **azure.get_tools(),
     **supabase.get_tools(),
     **github.get_tools(),
@@ -74,38 +100,154 @@ ALL_TOOLS = {
     **skills.get_tools(),
     **carbone.get_tools(),
     **metabase.get_tools(),
+})
+
+# Tool results larger than this are written to disk and returned by reference (0 disables)
+LARGE_OUTPUT_THRESHOLD = int(os.environ.get("MCP_LARGE_OUTPUT_THRESHOLD", str(256 * 1024)))
+# Private per-user directory (mode 0700) for those results; they may hold secrets or data dumps
+LARGE_OUTPUT_DIR = Path(
+    os.environ.get(
+        "MCP_LARGE_OUTPUT_DIR",
+        os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "devops-mcp", "outputs"),
+    )
+)
+LARGE_OUTPUT_PREVIEW = 4096
+# Stored results older than this many seconds are deleted by the output sweeper
+LARGE_OUTPUT_MAX_AGE = int(os.environ.get("MCP_LARGE_OUTPUT_MAX_AGE", "3600"))
+LARGE_OUTPUT_SWEEP_INTERVAL = 300
+
+# Max concurrent worker threads per synchronous tool handler
+TOOL_THREAD_LIMIT = int(os.environ.get("MCP_TOOL_THREAD_LIMIT", "32"))
+
+
+def _as_async(handler: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a synchronous handler so it runs in a worker thread, not on the event loop."""
+    if inspect.iscoroutinefunction(handler):
+        return handler
+    limit = asyncio.Semaphore(TOOL_THREAD_LIMIT)
+
+    async def run_in_thread(**kwargs):
+        async with limit:
+            return await asyncio.to_thread(handler, **kwargs)
+
+    return run_in_thread
+
+
+# Flat lookups used on every call_tool
+_HANDLERS: dict[str, Callable[..., Awaitable[Any]]] = {
+    name: _as_async(tool["handler"]) for name, tool in ALL_TOOLS.items()
+}
+_CACHE_TTLS: dict[str, int] = {
+    name: tool["cache_ttl"] for name, tool in ALL_TOOLS.items() if tool.get("cache_ttl")
 }
 
+# ALL_TOOLS is static after startup, so build the listing payloads once,
+# validating all Tool models in a single batch
+_TOOLS_LIST = TypeAdapter(list[Tool]).validate_python([
+    {
+        "name": name,
+        "description": tool["description"],
+        "inputSchema": tool["input_schema"],
+    }
+    for name, tool in ALL_TOOLS.items()
+])
+_TOOLS_JSON_BYTES = dumps_bytes({
+    "tools": [
+        {"name": tool.name, "description": tool.description}
+        for tool in _TOOLS_LIST
+    ]
+})
+
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """List all available DevOps tools."""
-    return [
-        Tool(
-            name=name,
-            description=tool["description"],
-            inputSchema=tool["input_schema"],
-        )
-        for name, tool in ALL_TOOLS.items()
-    ]
+    return _TOOLS_LIST
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Execute a DevOps tool."""
-    if name not in ALL_TOOLS:
+    handler = _HANDLERS.get(name)
+    if handler is None:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
-    tool = ALL_TOOLS[name]
-    handler = tool["handler"]
+    ttl = _CACHE_TTLS.get(name)
 
     try:
-        result = await handler(**arguments)
-        return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+        if ttl:
+            key = make_key(name, arguments)
+            result = response_cache.get(key)
+            if result is MISS:
+                result = await handler(**arguments)
+                # Error results are not cached, so a transient failure is retried on the next call
+                if not (isinstance(result, dict) and "error" in result):
+                    response_cache.set(key, result, ttl)
+        else:
+            result = await handler(**arguments)
+        payload = dumps_bytes(result, indent=True)
+        if LARGE_OUTPUT_THRESHOLD and len(payload) > LARGE_OUTPUT_THRESHOLD:
+            return [TextContent(type="text", text=await _store_large_output(name, payload))]
+        return [TextContent(type="text", text=payload.decode())]
     except Exception as e:
         return [TextContent(type="text", text=f"Error executing {name}: {str(e)}")]
 
 
+async def _store_large_output(name: str, payload: bytes) -> str:
+    """Write an oversized tool result to disk and return a reference with a preview."""
+    key = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    path = LARGE_OUTPUT_DIR / f"{key}.json"
+
+    def write():
+        LARGE_OUTPUT_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if path.exists():
+            # Same content again; refresh its age so the sweeper keeps it
+            os.utime(path)
+            return
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    await asyncio.to_thread(write)
+    return dumps({
+        "tool": name,
+        "truncated": True,
+        "size": len(payload),
+        "resource_uri": f"output://{key}",
+        "preview": payload[:LARGE_OUTPUT_PREVIEW].decode(errors="ignore"),
+    }, indent=True)
+
+
+def _prune_large_outputs(max_age: int = LARGE_OUTPUT_MAX_AGE) -> int:
+    """Delete stored large results older than max_age seconds; returns how many were removed."""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(LARGE_OUTPUT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+async def run_output_sweeper(interval: int = LARGE_OUTPUT_SWEEP_INTERVAL) -> None:
+    """Periodically delete expired large tool results."""
+    while True:
+        await asyncio.to_thread(_prune_large_outputs)
+        await asyncio.sleep(interval)
+
+
 @server.list_resources()
 async def list_resources() -> list[Resource]:
     """List available resources (skills, configs, etc.)."""
@@ -132,6 +274,14 @@ async def list_resources() -> list[Resource]:
             mimeType="application/json",
         )
     )
+    resources.append(
+        Resource(
+            uri="cache://stats",
+            name="Response Cache Stats",
+            description="Hit/miss counters for the tool response cache",
+            mimeType="application/json",
+        )
+    )
     
     return resources
 
@@ -144,19 +294,22 @@ async def read_resource(uri: str) -> str:
         return skills.get_skill_content(skill_id)
     
     if uri == "config://devops-mcp":
-        return json.dumps({
+        return dumps({
             "version": "1.0.0",
-            "integrations": {
-                "azure": azure.is_configured(),
-                "supabase": supabase.is_configured(),
-                "github": github.is_configured(),
-                "vercel": vercel.is_configured(),
-                "n8n": n8n.is_configured(),
-                "slack": slack.is_configured(),
-            },
+            "integrations": {name: provider.is_configured() for name, provider in INTEGRATIONS.items()},
             "tools_count": len(ALL_TOOLS),
             "timestamp": datetime.utcnow().isoformat(),
-        }, indent=2)
+        }, indent=True)
+    
+    if uri.startswith("output://"):
+        key = uri.removeprefix("output://")
+        path = LARGE_OUTPUT_DIR / f"{key}.json"
+        if re.fullmatch(r"[0-9a-f]{32}", key) and path.exists():
+            return await asyncio.to_thread(path.read_text)
+        return f"Resource not found: {uri}"
+    
+    if uri == "cache://stats":
+        return dumps(response_cache.stats(), indent=True)
     
     return f"Resource not found: {uri}"
 
@@ -180,45 +333,74 @@ async def list_resource_templates() -> list[ResourceTemplate]:
             name="Supabase Table Schema",
             description="Get schema for a Supabase table",
         ),
+        ResourceTemplate(
+            uriTemplate="output://{key}",
+            name="Large Tool Output",
+            description="Full result of a tool call that exceeded the inline size limit",
+        ),
     ]
 
 
+async def close_clients():
+    """Close pooled clients held by tool providers."""
+    for provider in (azure, github, carbone, metabase, n8n, slack):
+        await provider.aclose()
+
+
 async def run_stdio():
     """Run the MCP server in stdio mode (for Claude Desktop/Code)."""
     logger.info("Starting DevOps MCP in stdio mode")
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options(),
-        )
+    output_sweeper = asyncio.create_task(run_output_sweeper())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options(),
+            )
+    finally:
+        output_sweeper.cancel()
+        await close_clients()
 
 
-def run_sse(host: str, port: int, auth_token: str = None):
-    """Run the MCP server in SSE mode (for Claude.ai connector)."""
-    try:
-        from mcp.server.sse import SseServerTransport
-        from starlette.applications import Starlette
-        from starlette.routing import Route, Mount
-        from starlette.responses import JSONResponse, Response, RedirectResponse
-        from starlette.middleware import Middleware
-        from starlette.middleware.cors import CORSMiddleware
-        import uvicorn
-    except ImportError as e:
-        logger.error(f"SSE mode requires additional dependencies: {e}")
-        logger.error("Install with: pip install 'mcp[sse]' starlette uvicorn")
-        return
+def run_with_loop(coro, loop: str = "auto"):
+    """Run a coroutine on uvloop when available (or requested), else asyncio."""
+    if loop != "asyncio" and sys.platform != "win32":
+        try:
+            import uvloop
+            return uvloop.run(coro)
+        except ImportError:
+            if loop == "uvloop":
+                logger.warning("uvloop is not installed, falling back to asyncio")
+    return asyncio.run(coro)
+
+
+def create_sse_app(auth_token: str = None):
+    """Build the Starlette app for SSE mode (for Claude.ai connector)."""
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.routing import Route, Mount
+    from starlette.responses import JSONResponse as _StarletteJSONResponse, Response, RedirectResponse
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+
+    class JSONResponse(_StarletteJSONResponse):
+        """JSONResponse rendered with orjson when available."""
+
+        def render(self, content) -> bytes:
+            return dumps_bytes(content)
 
     # Import OAuth module
     from .oauth import (
-        get_oauth_metadata,
-        get_protected_resource_metadata,
+        get_oauth_metadata_bytes,
+        get_protected_resource_metadata_bytes,
         register_client,
         create_authorization_code,
         exchange_code_for_tokens,
         refresh_access_token,
         validate_access_token,
-        get_jwks,
+        get_jwks_bytes,
+        run_sweeper,
     )
 
     # Get auth token from env if not provided
@@ -228,16 +410,45 @@ def run_sse(host: str, port: int, auth_token: str = None):
     # Create SSE transport - client will POST to /messages
     sse_transport = SseServerTransport("/messages")
 
-    def check_auth(request) -> bool:
+    static_token = auth_token.encode() if auth_token else None
+
+    # Recently validated OAuth tokens -> expiry, so hot tokens skip the store
+    validated_tokens: OrderedDict[str, float] = OrderedDict()
+    validated_tokens_max = 256
+
+    def bearer_from_scope(scope) -> Optional[str]:
+        """Read the bearer token straight from raw ASGI headers (None if absent)."""
+        for key, value in scope["headers"]:
+            if key == b"authorization":
+                if value.startswith(b"Bearer "):
+                    return value[7:].decode("latin-1")
+                return None
+        return None
+
+    def client_from_scope(scope) -> str:
+        """Format the client address for logging."""
+        client = scope.get("client")
+        return f"{client[0]}:{client[1]}" if client else "unknown"
+
+    async def check_auth(scope) -> bool:
         """Check if request has valid authentication via OAuth or static token."""
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header[7:]
+        token = bearer_from_scope(scope)
+        if token is not None:
+            expires_at = validated_tokens.get(token)
+            if expires_at is not None:
+                if expires_at > time.time():
+                    validated_tokens.move_to_end(token)
+                    return True
+                del validated_tokens[token]
             # Check OAuth token first
-            if validate_access_token(token):
+            token_data = await validate_access_token(token)
+            if token_data:
+                validated_tokens[token] = token_data.get("expires_at", 0)
+                if len(validated_tokens) > validated_tokens_max:
+                    validated_tokens.popitem(last=False)
                 return True
             # Fall back to static token
-            if auth_token and token == auth_token:
+            if static_token and hmac.compare_digest(token.encode(), static_token):
                 return True
             return False
         # Allow unauthenticated if no auth configured
@@ -247,17 +458,16 @@ def run_sse(host: str, port: int, auth_token: str = None):
 
     async def sse_app(scope, receive, send):
         """ASGI app for SSE connections."""
-        from starlette.requests import Request
-        request = Request(scope, receive)
-
         # Check auth for SSE connections
-        if not check_auth(request):
-            logger.warning(f"Unauthorized SSE connection attempt from {request.client}")
+        if not await check_auth(scope):
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Unauthorized SSE connection attempt from %s", client_from_scope(scope))
             response = Response("Unauthorized", status_code=401)
             await response(scope, receive, send)
             return
 
-        logger.info(f"SSE connection from {request.client}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("SSE connection from %s", client_from_scope(scope))
         try:
             async with sse_transport.connect_sse(scope, receive, send) as streams:
                 await server.run(
@@ -266,16 +476,14 @@ def run_sse(host: str, port: int, auth_token: str = None):
                     server.create_initialization_options(),
                 )
         except Exception as e:
-            logger.error(f"SSE error: {e}")
+            logger.error("SSE error: %s", e)
 
     async def messages_app(scope, receive, send):
         """ASGI app for POST messages."""
-        from starlette.requests import Request
-        request = Request(scope, receive)
-
         # Check auth for message posts
-        if not check_auth(request):
-            logger.warning(f"Unauthorized message attempt from {request.client}")
+        if not await check_auth(scope):
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Unauthorized message attempt from %s", client_from_scope(scope))
             response = Response("Unauthorized", status_code=401)
             await response(scope, receive, send)
             return
@@ -295,39 +503,66 @@ def run_sse(host: str, port: int, auth_token: str = None):
 
     async def list_tools_endpoint(request):
         """List available tools (for debugging)."""
-        return JSONResponse({
-            "tools": [
-                {"name": name, "description": tool["description"]}
-                for name, tool in ALL_TOOLS.items()
-            ]
-        })
+        return Response(_TOOLS_JSON_BYTES, media_type="application/json")
+
+    def static_json_endpoint(body: bytes):
+        """Serve a prebuilt JSON document with an ETag, answering 304 on a match."""
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+
+        async def endpoint(request):
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            return Response(body, media_type="application/json", headers=headers)
+
+        return endpoint
 
     # OAuth 2.0 endpoints
-    async def oauth_authorization_server_metadata(request):
-        """RFC 8414 - OAuth 2.0 Authorization Server Metadata."""
-        return JSONResponse(get_oauth_metadata())
+    # RFC 8414 - OAuth 2.0 Authorization Server Metadata
+    oauth_authorization_server_metadata = static_json_endpoint(get_oauth_metadata_bytes())
+    # OAuth 2.0 Protected Resource Metadata (also served for the /sse path)
+    oauth_protected_resource_metadata = static_json_endpoint(get_protected_resource_metadata_bytes())
+    # JWKS endpoint
+    oauth_jwks = static_json_endpoint(get_jwks_bytes())
 
-    async def oauth_protected_resource_metadata(request):
-        """OAuth 2.0 Protected Resource Metadata."""
-        return JSONResponse(get_protected_resource_metadata())
+    max_oauth_body = 64 * 1024
 
-    async def oauth_protected_resource_sse(request):
-        """OAuth 2.0 Protected Resource Metadata for /sse path."""
-        return JSONResponse(get_protected_resource_metadata())
+    def body_too_large(request) -> bool:
+        """Reject oversized OAuth bodies up front based on Content-Length."""
+        try:
+            return int(request.headers.get("content-length", "0")) > max_oauth_body
+        except ValueError:
+            return True
 
-    async def oauth_jwks(request):
-        """JWKS endpoint."""
-        return JSONResponse(get_jwks())
+    async def read_body(request) -> Optional[bytes]:
+        """Read an OAuth request body, or return None once it exceeds max_oauth_body.
+        
+        The limit is enforced on the bytes actually received, so chunked bodies without a
+        Content-Length are capped too.
+        """
+        if body_too_large(request):
+            return None
+        chunks = []
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_oauth_body:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
 
     async def oauth_register(request):
         """Dynamic Client Registration (RFC 7591)."""
+        raw = await read_body(request)
+        if raw is None:
+            return JSONResponse({"error": "invalid_request"}, status_code=413)
         try:
-            body = await request.json()
-            client_data = register_client(body)
-            logger.info(f"Registered new OAuth client: {client_data['client_id']}")
+            body = loads(raw)
+            client_data = await register_client(body)
+            logger.info("Registered new OAuth client: %s", client_data["client_id"])
             return JSONResponse(client_data, status_code=201)
         except Exception as e:
-            logger.error(f"Client registration failed: {e}")
+            logger.error("Client registration failed: %s", e)
             return JSONResponse({"error": "invalid_client_metadata"}, status_code=400)
 
     async def oauth_authorize(request):
@@ -344,7 +579,7 @@ def run_sse(host: str, port: int, auth_token: str = None):
             return JSONResponse({"error": "unsupported_response_type"}, status_code=400)
 
         # Auto-approve and create authorization code
-        code = create_authorization_code(
+        code = await create_authorization_code(
             client_id=client_id,
             redirect_uri=redirect_uri,
             scope=scope,
@@ -357,20 +592,23 @@ def run_sse(host: str, port: int, auth_token: str = None):
         if state:
             redirect_url += f"&state={state}"
 
-        logger.info(f"OAuth authorization granted for client {client_id}")
+        logger.info("OAuth authorization granted for client %s", client_id)
         return RedirectResponse(url=redirect_url, status_code=302)
 
     async def oauth_token(request):
         """Token endpoint."""
         import base64
+        raw = await read_body(request)
+        if raw is None:
+            return JSONResponse({"error": "invalid_request"}, status_code=413)
         try:
             # Support both form and JSON
             content_type = request.headers.get("content-type", "")
             if "application/json" in content_type:
-                body = await request.json()
+                body = loads(raw)
             else:
-                form = await request.form()
-                body = dict(form)
+                # Token requests are application/x-www-form-urlencoded (RFC 6749 section 4.1.3)
+                body = dict(parse_qsl(raw.decode(), keep_blank_values=True))
 
             grant_type = body.get("grant_type")
             client_id = body.get("client_id")
@@ -387,15 +625,15 @@ def run_sse(host: str, port: int, auth_token: str = None):
                 redirect_uri = body.get("redirect_uri")
                 code_verifier = body.get("code_verifier")
 
-                tokens = exchange_code_for_tokens(code, client_id, redirect_uri, code_verifier)
+                tokens = await exchange_code_for_tokens(code, client_id, redirect_uri, code_verifier)
                 if tokens:
-                    logger.info(f"OAuth tokens issued for client {client_id}")
+                    logger.info("OAuth tokens issued for client %s", client_id)
                     return JSONResponse(tokens)
                 return JSONResponse({"error": "invalid_grant"}, status_code=400)
 
             elif grant_type == "refresh_token":
                 refresh_token_val = body.get("refresh_token")
-                tokens = refresh_access_token(refresh_token_val, client_id)
+                tokens = await refresh_access_token(refresh_token_val, client_id)
                 if tokens:
                     return JSONResponse(tokens)
                 return JSONResponse({"error": "invalid_grant"}, status_code=400)
@@ -403,12 +641,24 @@ def run_sse(host: str, port: int, auth_token: str = None):
             return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
 
         except Exception as e:
-            logger.error(f"Token endpoint error: {e}")
+            logger.error("Token endpoint error: %s", e)
             return JSONResponse({"error": "server_error"}, status_code=500)
 
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        """Run the OAuth expiry and large-output sweepers for the lifetime of the server."""
+        sweepers = [asyncio.create_task(run_sweeper()), asyncio.create_task(run_output_sweeper())]
+        try:
+            yield
+        finally:
+            for sweeper in sweepers:
+                sweeper.cancel()
+            await close_clients()
+
     # Create Starlette app with CORS - allow all origins for Claude.ai compatibility
     app = Starlette(
         debug=True,
+        lifespan=lifespan,
         routes=[
             # Health and tools
             Route("/health", health_check, methods=["GET"]),
@@ -416,7 +666,7 @@ def run_sse(host: str, port: int, auth_token: str = None):
             # OAuth 2.0 discovery endpoints
             Route("/.well-known/oauth-authorization-server", oauth_authorization_server_metadata, methods=["GET"]),
             Route("/.well-known/oauth-protected-resource", oauth_protected_resource_metadata, methods=["GET"]),
-            Route("/.well-known/oauth-protected-resource/sse", oauth_protected_resource_sse, methods=["GET"]),
+            Route("/.well-known/oauth-protected-resource/sse", oauth_protected_resource_metadata, methods=["GET"]),
             Route("/.well-known/jwks.json", oauth_jwks, methods=["GET"]),
             # OAuth 2.0 endpoints
             Route("/oauth/register", oauth_register, methods=["POST"]),
@@ -439,12 +689,43 @@ def run_sse(host: str, port: int, auth_token: str = None):
         ],
     )
 
-    logger.info(f"Starting DevOps MCP SSE server on {host}:{port}")
-    logger.info(f"SSE endpoint: http://{host}:{port}/sse")
-    logger.info(f"OAuth endpoints: /oauth/authorize, /oauth/token, /oauth/register")
-    logger.info(f"Health check: http://{host}:{port}/health")
+    return app
+
+
+def run_sse(host: str, port: int, auth_token: str = None, workers: int = 1, loop: str = "auto"):
+    """Run the MCP server in SSE mode (for Claude.ai connector)."""
+    try:
+        import uvicorn
+        app = create_sse_app(auth_token)
+    except ImportError as e:
+        logger.error("SSE mode requires additional dependencies: %s", e)
+        logger.error("Install with: pip install 'mcp[sse]' starlette uvicorn")
+        return
 
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    logger.info("Starting DevOps MCP SSE server on %s:%s", host, port)
+    logger.info("SSE endpoint: http://%s:%s/sse", host, port)
+    logger.info("OAuth endpoints: /oauth/authorize, /oauth/token, /oauth/register")
+    logger.info("Health check: http://%s:%s/health", host, port)
+
+    if workers > 1:
+        # Each worker has its own SSE sessions and (without Redis) its own OAuth store
+        if not os.environ.get("MCP_REDIS_URL"):
+            logger.warning("Running %d workers without MCP_REDIS_URL: OAuth tokens will not be shared", workers)
+        logger.warning("SSE sessions are bound to one worker; front multiple workers with sticky routing")
+        # Workers re-import the app by name, so hand the token over via the environment
+        if auth_token:
+            os.environ["MCP_AUTH_TOKEN"] = auth_token
+        uvicorn.run(
+            "devops_mcp.__main__:create_sse_app",
+            factory=True,
+            host=host,
+            port=port,
+            workers=workers,
+            loop=loop,
+            log_level="info",
+        )
+    else:
+        uvicorn.run(app, host=host, port=port, loop=loop, log_level="info")
 
 
 def main():
@@ -473,13 +754,25 @@ def main():
         default=None,
         help="Bearer token for authentication (or set MCP_AUTH_TOKEN env var)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("MCP_WORKERS", "1")),
+        help="Number of uvicorn worker processes for SSE mode (default: 1, or MCP_WORKERS)"
+    )
+    parser.add_argument(
+        "--loop",
+        choices=["auto", "asyncio", "uvloop"],
+        default="auto",
+        help="Event loop implementation (default: auto, uses uvloop if installed)"
+    )
 
     args = parser.parse_args()
 
     if args.sse:
-        run_sse(args.host, args.port, args.auth_token)
+        run_sse(args.host, args.port, args.auth_token, workers=args.workers, loop=args.loop)
     else:
-        asyncio.run(run_stdio())
+        run_with_loop(run_stdio(), args.loop)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+Response cache for idempotent tool calls.
+In-memory LRU with per-entry TTL, keyed on tool name + canonical arguments.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+# Sentinel for cache misses (None is a valid cached result)
+MISS = object()
+
+
+def make_key(name: str, arguments: dict) -> str:
+    """Build a stable cache key from a tool name and its arguments."""
+    canonical = json.dumps(arguments, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{name}:{canonical}".encode(), digest_size=16).hexdigest()
+
+
+async def coalesce(inflight: dict, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Run factory() once per key at a time; concurrent callers with the same key share its result."""
+    future = inflight.get(key)
+    if future is not None:
+        # Shielded so one waiter being cancelled does not cancel the shared call
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    inflight[key] = future
+    try:
+        result = await factory()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved; waiters still see it raised
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del inflight[key]
+
+
+def cached(ttl: float, when: Optional[Callable[[dict], bool]] = None):
+    """Cache an async method's result for ttl seconds, keyed by its name and arguments.
+
+    The instance provides self._cache (a TTLCache) and self._inflight (a dict for coalesce).
+    If given, when(arguments) decides whether a particular call may be cached. Results that
+    carry an "error" key are returned but not cached.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            bound = sig.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["self"]
+            if when is not None and not when(arguments):
+                return await fn(self, *args, **kwargs)
+
+            key = make_key(fn.__name__, arguments)
+            value = self._cache.get(key)
+            if value is MISS:
+                # Concurrent identical misses share a single upstream call
+                value = await coalesce(self._inflight, key, lambda: fn(self, *args, **kwargs))
+                if not (isinstance(value, dict) and "error" in value):
+                    self._cache.set(key, value, ttl)
+            return value
+
+        return wrapper
+    return decorator
+
+
+class TTLCache:
+    """LRU cache whose entries expire after a per-entry TTL.
+
+    With max_bytes set, entries also carry a caller-supplied size and the least recently
+    used ones are evicted while the total exceeds it.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or MISS if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        value, expires_at, size = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._bytes -= size
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0) -> None:
+        """Store a value for ttl seconds, evicting least recently used entries if full."""
+        self.discard(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def discard(self, *keys: str) -> None:
+        """Remove the given keys if present."""
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -5,14 +5,21 @@ Supports Dynamic Client Registration (DCR) as required by Claude.ai.
 
 import os
 import json
+import time
+import asyncio
 import uuid
 import secrets
 import hashlib
+import hmac
 import base64
-from datetime import datetime, timedelta
-from typing import Optional
+import binascii
+import functools
+import heapq
+from typing import Any, Optional
 from urllib.parse import urlencode
 
+from .serialization import dumps_bytes
+
 # Azure Entra ID configuration
 AZURE_TENANT_ID = os.environ.get("AZURE_TENANT_ID", "2601808d-88e3-4af3-a6b8-377f2c915782")
 AZURE_CLIENT_ID = os.environ.get("MCP_OAUTH_CLIENT_ID", "3297d116-3d21-49af-b7f2-177e6326f6b1")
@@ -23,13 +30,125 @@ AZURE_AUTH_URL = f"https://login.microsoftonline.com/{AZURE_TENANT_ID}/oauth2/v2
 AZURE_TOKEN_URL = f"https://login.microsoftonline.com/{AZURE_TENANT_ID}/oauth2/v2.0/token"
 AZURE_JWKS_URL = f"https://login.microsoftonline.com/{AZURE_TENANT_ID}/discovery/v2.0/keys"
 
-# In-memory stores (use Redis/DB in production)
-_registered_clients = {}
-_authorization_codes = {}
-_access_tokens = {}
-_refresh_tokens = {}
+# Key prefixes for each kind of OAuth state
+CLIENT_PREFIX = "oauth:client:"
+CODE_PREFIX = "oauth:code:"
+ACCESS_PREFIX = "oauth:at:"
+REFRESH_PREFIX = "oauth:rt:"
+
+AUTH_CODE_TTL = 600  # 10 minutes
+ACCESS_TOKEN_TTL = 3600  # 1 hour
+SWEEP_INTERVAL = 60
+
+
+class MemoryStore:
+    """Process-local OAuth store. Only valid for a single worker process."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[dict, Optional[float]]] = {}
+        # (expires_at, key) for entries with a TTL; may hold stale entries
+        self._expiry_heap: list[tuple[float, str]] = []
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def getdel(self, key: str) -> Optional[dict]:
+        value = await self.get(key)
+        self._data.pop(key, None)
+        return value
+
+    async def set(self, key: str, value: dict, ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def set_many(self, items: list[tuple[str, dict, Optional[int]]]) -> None:
+        for key, value, ttl in items:
+            await self.set(key, value, ttl)
+
+    async def sweep(self) -> int:
+        """Evict all expired entries, returning how many were removed."""
+        now = time.time()
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Skip heap entries for keys that were deleted or re-set since
+            if entry is not None and entry[1] == expires_at:
+                del self._data[key]
+                removed += 1
+        return removed
+
+
+class RedisStore:
+    """Redis-backed OAuth store shared across worker processes. Expiry uses native TTLs."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._redis = redis.Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(key)
+        return json.loads(raw) if raw else None
+
+    async def getdel(self, key: str) -> Optional[dict]:
+        raw = await self._redis.getdel(key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict, ttl: Optional[int] = None) -> None:
+        await self._redis.set(key, json.dumps(value), ex=ttl)
+
+    async def set_many(self, items: list[tuple[str, dict, Optional[int]]]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value, ttl in items:
+                pipe.set(key, json.dumps(value), ex=ttl)
+            await pipe.execute()
+
+    async def sweep(self) -> int:
+        """No-op: Redis expires keys natively."""
+        return 0
+
+
+_store: Any = None
+
+
+def get_store():
+    """Return the OAuth store, using Redis when MCP_REDIS_URL is set."""
+    global _store
+    if _store is None:
+        redis_url = os.environ.get("MCP_REDIS_URL")
+        _store = RedisStore(redis_url) if redis_url else MemoryStore()
+    return _store
+
+
+async def run_sweeper(interval: int = SWEEP_INTERVAL) -> None:
+    """Periodically evict expired codes and tokens from the store."""
+    while True:
+        await asyncio.sleep(interval)
+        await get_store().sweep()
+
+
+def _b64url(raw: bytes) -> str:
+    """Encode bytes as unpadded base64url, as secrets.token_urlsafe does."""
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
 
 
+def _token_pair() -> tuple[str, str]:
+    """Generate two 32-byte tokens from a single random read."""
+    raw = secrets.token_bytes(64)
+    return _b64url(raw[:32]), _b64url(raw[32:])
+
+
+@functools.lru_cache(maxsize=1)
 def get_server_url():
     """Get the MCP server URL from environment."""
     return os.environ.get("MCP_SERVER_URL", "https://20-5-185-136.sslip.io")
@@ -65,18 +184,19 @@ def get_protected_resource_metadata():
     }
 
 
-def register_client(client_metadata: dict) -> dict:
+async def register_client(client_metadata: dict) -> dict:
     """
     Dynamic Client Registration (RFC 7591).
     Claude.ai will call this to register itself as a client.
     """
-    client_id = str(uuid.uuid4())
-    client_secret = secrets.token_urlsafe(32)
+    raw = secrets.token_bytes(48)
+    client_id = str(uuid.UUID(bytes=raw[:16], version=4))
+    client_secret = _b64url(raw[16:])
 
     client_data = {
         "client_id": client_id,
         "client_secret": client_secret,
-        "client_id_issued_at": int(datetime.utcnow().timestamp()),
+        "client_id_issued_at": int(time.time()),
         "client_secret_expires_at": 0,  # Never expires
         "redirect_uris": client_metadata.get("redirect_uris", []),
         "token_endpoint_auth_method": client_metadata.get("token_endpoint_auth_method", "client_secret_basic"),
@@ -86,33 +206,57 @@ def register_client(client_metadata: dict) -> dict:
         "scope": client_metadata.get("scope", "mcp:tools mcp:resources"),
     }
 
-    _registered_clients[client_id] = client_data
+    await get_store().set(CLIENT_PREFIX + client_id, client_data)
     return client_data
 
 
-def get_client(client_id: str) -> Optional[dict]:
+async def get_client(client_id: str) -> Optional[dict]:
     """Get a registered client."""
-    return _registered_clients.get(client_id)
+    return await get_store().get(CLIENT_PREFIX + client_id)
 
 
-def create_authorization_code(client_id: str, redirect_uri: str, scope: str, code_challenge: str = None, code_challenge_method: str = None) -> str:
+async def create_authorization_code(client_id: str, redirect_uri: str, scope: str, code_challenge: str = None, code_challenge_method: str = None) -> str:
     """Create an authorization code for the OAuth flow."""
     code = secrets.token_urlsafe(32)
-    _authorization_codes[code] = {
+    code_data = {
         "client_id": client_id,
         "redirect_uri": redirect_uri,
         "scope": scope,
         "code_challenge": code_challenge,
         "code_challenge_method": code_challenge_method,
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(minutes=10),
+        "created_at": time.time(),
     }
+    if code_challenge and code_challenge_method == "S256":
+        # Decode once so the exchange compares raw SHA-256 digests
+        code_data["code_challenge_raw"] = _decode_s256_challenge(code_challenge)
+    await get_store().set(CODE_PREFIX + code, code_data, ttl=AUTH_CODE_TTL)
     return code
 
 
-def exchange_code_for_tokens(code: str, client_id: str, redirect_uri: str, code_verifier: str = None) -> Optional[dict]:
+def _decode_s256_challenge(code_challenge: str) -> Optional[str]:
+    """Decode a base64url S256 challenge to the hex of its 32-byte digest."""
+    try:
+        raw = base64.urlsafe_b64decode(code_challenge + "=" * (-len(code_challenge) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    return raw.hex() if len(raw) == 32 else None
+
+
+def _verify_pkce(auth_code: dict, code_verifier: str) -> bool:
+    """Check a PKCE code_verifier against the stored challenge."""
+    if auth_code["code_challenge_method"] == "S256":
+        expected = auth_code.get("code_challenge_raw")
+        if not expected:
+            return False
+        digest = hashlib.sha256(code_verifier.encode()).digest()
+        return hmac.compare_digest(digest, bytes.fromhex(expected))
+    return hmac.compare_digest(code_verifier.encode(), auth_code["code_challenge"].encode())
+
+
+async def exchange_code_for_tokens(code: str, client_id: str, redirect_uri: str, code_verifier: str = None) -> Optional[dict]:
     """Exchange authorization code for access and refresh tokens."""
-    auth_code = _authorization_codes.get(code)
+    # Codes are single-use: fetch and delete atomically
+    auth_code = await get_store().getdel(CODE_PREFIX + code)
     if not auth_code:
         return None
 
@@ -121,43 +265,30 @@ def exchange_code_for_tokens(code: str, client_id: str, redirect_uri: str, code_
         return None
     if auth_code["redirect_uri"] != redirect_uri:
         return None
-    if auth_code["expires_at"] < datetime.utcnow():
-        del _authorization_codes[code]
-        return None
 
     # Validate PKCE if used
     if auth_code.get("code_challenge"):
-        if not code_verifier:
-            return None
-        if auth_code["code_challenge_method"] == "S256":
-            expected = base64.urlsafe_b64encode(
-                hashlib.sha256(code_verifier.encode()).digest()
-            ).rstrip(b"=").decode()
-        else:
-            expected = code_verifier
-        if expected != auth_code["code_challenge"]:
+        if not code_verifier or not _verify_pkce(auth_code, code_verifier):
             return None
 
-    # Delete used code
-    del _authorization_codes[code]
-
     # Create tokens
-    access_token = secrets.token_urlsafe(32)
-    refresh_token = secrets.token_urlsafe(32)
-    expires_in = 3600  # 1 hour
-
-    _access_tokens[access_token] = {
-        "client_id": client_id,
-        "scope": auth_code["scope"],
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(seconds=expires_in),
-    }
-
-    _refresh_tokens[refresh_token] = {
-        "client_id": client_id,
-        "scope": auth_code["scope"],
-        "created_at": datetime.utcnow(),
-    }
+    access_token, refresh_token = _token_pair()
+    expires_in = ACCESS_TOKEN_TTL
+
+    created_at = time.time()
+    await get_store().set_many([
+        (ACCESS_PREFIX + access_token, {
+            "client_id": client_id,
+            "scope": auth_code["scope"],
+            "created_at": created_at,
+            "expires_at": created_at + expires_in,
+        }, expires_in),
+        (REFRESH_PREFIX + refresh_token, {
+            "client_id": client_id,
+            "scope": auth_code["scope"],
+            "created_at": created_at,
+        }, None),
+    ])
 
     return {
         "access_token": access_token,
@@ -168,22 +299,23 @@ def exchange_code_for_tokens(code: str, client_id: str, redirect_uri: str, code_
     }
 
 
-def refresh_access_token(refresh_token: str, client_id: str) -> Optional[dict]:
+async def refresh_access_token(refresh_token: str, client_id: str) -> Optional[dict]:
     """Refresh an access token using a refresh token."""
-    token_data = _refresh_tokens.get(refresh_token)
+    token_data = await get_store().get(REFRESH_PREFIX + refresh_token)
     if not token_data or token_data["client_id"] != client_id:
         return None
 
     # Create new access token
     access_token = secrets.token_urlsafe(32)
-    expires_in = 3600
+    expires_in = ACCESS_TOKEN_TTL
 
-    _access_tokens[access_token] = {
+    created_at = time.time()
+    await get_store().set(ACCESS_PREFIX + access_token, {
         "client_id": client_id,
         "scope": token_data["scope"],
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(seconds=expires_in),
-    }
+        "created_at": created_at,
+        "expires_at": created_at + expires_in,
+    }, ttl=expires_in)
 
     return {
         "access_token": access_token,
@@ -194,17 +326,27 @@ def refresh_access_token(refresh_token: str, client_id: str) -> Optional[dict]:
     }
 
 
-def validate_access_token(token: str) -> Optional[dict]:
+async def validate_access_token(token: str) -> Optional[dict]:
     """Validate an access token and return its data."""
-    token_data = _access_tokens.get(token)
-    if not token_data:
-        return None
-    if token_data["expires_at"] < datetime.utcnow():
-        del _access_tokens[token]
-        return None
-    return token_data
+    return await get_store().get(ACCESS_PREFIX + token)
 
 
 def get_jwks():
     """Return empty JWKS (we use opaque tokens, not JWTs)."""
     return {"keys": []}
+
+
+# Discovery documents are static for the life of the process, so serialize once
+@functools.lru_cache(maxsize=1)
+def get_oauth_metadata_bytes() -> bytes:
+    return dumps_bytes(get_oauth_metadata())
+
+
+@functools.lru_cache(maxsize=1)
+def get_protected_resource_metadata_bytes() -> bytes:
+    return dumps_bytes(get_protected_resource_metadata())
+
+
+@functools.lru_cache(maxsize=1)
+def get_jwks_bytes() -> bytes:
+    return dumps_bytes(get_jwks())
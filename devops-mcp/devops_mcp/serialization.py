@@ -0,0 +1,36 @@
+"""
+JSON serialization helpers.
+Uses orjson when installed (pip install 'devops-mcp[perf]'), falling back to stdlib json.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes. Unknown types are rendered with str()."""
+    if orjson is not None:
+        option = _ORJSON_OPTS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTS
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize obj to a JSON string. Unknown types are rendered with str()."""
+    if orjson is not None:
+        return dumps_bytes(obj, indent).decode()
+    return json.dumps(obj, indent=2 if indent else None, default=str)
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
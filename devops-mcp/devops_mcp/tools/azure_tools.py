@@ -6,36 +6,119 @@ Tools for managing Azure resources including VMs, Container Apps, Storage, and K
 
 import os
 import json
+import asyncio
+import time
 from typing import Any, Optional
 from datetime import datetime
 
-# Azure SDK imports (lazy loaded)
+from ..cache import TTLCache, MISS
+
+# Max concurrent instance_view requests per list_vms call
+INSTANCE_VIEW_CONCURRENCY = int(os.environ.get("AZURE_INSTANCE_VIEW_CONCURRENCY", "16"))
+
+# How long VM listings and power states are served from cache (seconds, 0 disables)
+VM_CACHE_TTL = int(os.environ.get("AZURE_VM_CACHE_TTL", "15"))
+
+# ARM request budget per subscription (requests/hour); 429 Retry-After is honored by the SDK retry policy
+ARM_READS_PER_HOUR = int(os.environ.get("AZURE_ARM_READS_PER_HOUR", "12000"))
+ARM_WRITES_PER_HOUR = int(os.environ.get("AZURE_ARM_WRITES_PER_HOUR", "1200"))
+
+# Azure SDK imports (lazy loaded, async variants)
 _azure_mgmt_compute = None
 _azure_mgmt_containerinstance = None
 _azure_identity = None
+_azure_keyvault_secrets = None
 
 
 def _get_azure_credential():
-    """Get Azure credential using DefaultAzureCredential."""
+    """Get async Azure credential using DefaultAzureCredential."""
     global _azure_identity
     if _azure_identity is None:
-        from azure.identity import DefaultAzureCredential
+        from azure.identity.aio import DefaultAzureCredential
         _azure_identity = DefaultAzureCredential
     return _azure_identity()
 
 
-def _get_compute_client():
-    """Get Azure Compute Management client."""
+def _get_compute_client(credential):
+    """Get async Azure Compute Management client."""
     global _azure_mgmt_compute
     if _azure_mgmt_compute is None:
-        from azure.mgmt.compute import ComputeManagementClient
+        from azure.mgmt.compute.aio import ComputeManagementClient
         _azure_mgmt_compute = ComputeManagementClient
     
     subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
     if not subscription_id:
         raise ValueError("AZURE_SUBSCRIPTION_ID environment variable not set")
     
-    return _azure_mgmt_compute(_get_azure_credential(), subscription_id)
+    return _azure_mgmt_compute(credential, subscription_id)
+
+
+def _get_secret_client(vault_name: str, credential):
+    """Get async Key Vault secrets client."""
+    global _azure_keyvault_secrets
+    if _azure_keyvault_secrets is None:
+        from azure.keyvault.secrets.aio import SecretClient
+        _azure_keyvault_secrets = SecretClient
+    
+    vault_url = f"https://{vault_name}.vault.azure.net"
+    return _azure_keyvault_secrets(vault_url=vault_url, credential=credential)
+
+
+class AsyncTokenBucket:
+    """Token bucket rate limiter for coroutines; acquire() waits until a token is available."""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+# (subscription_id, "read" | "write") -> bucket
+_arm_buckets: dict[tuple[str, str], AsyncTokenBucket] = {}
+
+
+def _arm_bucket(subscription_id: str, kind: str) -> AsyncTokenBucket:
+    """Get the shared ARM rate limiter for a subscription and request kind."""
+    bucket = _arm_buckets.get((subscription_id, kind))
+    if bucket is None:
+        per_hour = ARM_WRITES_PER_HOUR if kind == "write" else ARM_READS_PER_HOUR
+        # Allow bursts of up to one minute's budget
+        bucket = AsyncTokenBucket(per_hour / 3600, max(1.0, per_hour / 60))
+        _arm_buckets[(subscription_id, kind)] = bucket
+    return bucket
+
+
+def _rg_of(resource_id: str) -> str:
+    """Resource group segment of an ARM ID (/subscriptions/<sub>/resourceGroups/<rg>/...)."""
+    start = resource_id.find("/", resource_id.find("/", 1) + 1)
+    start = resource_id.find("/", start + 1) + 1
+    end = resource_id.find("/", start)
+    return resource_id[start:end] if end != -1 else resource_id[start:]
+
+
+def _vm_states(instance_view) -> tuple[str, str]:
+    """Extract (power_state, provisioning_state) from a VM instance view."""
+    power_state = "unknown"
+    provisioning_state = "unknown"
+    for status in instance_view.statuses or ():
+        if status.code.startswith("PowerState/"):
+            power_state = status.code[len("PowerState/"):]
+        elif status.code.startswith("ProvisioningState/"):
+            provisioning_state = status.code[len("ProvisioningState/"):]
+    return power_state, provisioning_state
 
 
 class AzureTools:
@@ -43,14 +126,64 @@ class AzureTools:
     
     def __init__(self):
         self.subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
+        # Long-lived clients so the underlying connection pool is reused
+        self._credential = None
+        self._compute = None
+        self._secret_clients: dict[str, Any] = {}
+        self._tools: Optional[dict[str, dict]] = None
+        # Short-lived cache of VM reads to spare ARM's read quota
+        self._vm_cache = TTLCache(max_entries=256)
     
     def is_configured(self) -> bool:
         """Check if Azure is properly configured."""
         return bool(self.subscription_id)
     
+    def _get_credential(self):
+        if self._credential is None:
+            self._credential = _get_azure_credential()
+        return self._credential
+    
+    def _compute_client(self):
+        if self._compute is None:
+            self._compute = _get_compute_client(self._get_credential())
+        return self._compute
+    
+    def _secret_client(self, vault_name: str):
+        client = self._secret_clients.get(vault_name)
+        if client is None:
+            client = _get_secret_client(vault_name, self._get_credential())
+            self._secret_clients[vault_name] = client
+        return client
+    
+    async def _throttle(self, kind: str):
+        """Wait for ARM request budget ("read" or "write")."""
+        await _arm_bucket(self.subscription_id or "", kind).acquire()
+    
+    def _invalidate_vm(self, resource_group: str, vm_name: str):
+        """Drop cached reads that a write to this VM makes stale."""
+        self._vm_cache.discard(
+            f"vm_status:{resource_group}:{vm_name}",
+            f"list_vms:{resource_group}",
+            "list_vms:",
+        )
+    
+    async def aclose(self):
+        """Close cached Azure clients and the credential."""
+        for client in self._secret_clients.values():
+            await client.close()
+        self._secret_clients.clear()
+        if self._compute is not None:
+            await self._compute.close()
+            self._compute = None
+        if self._credential is not None:
+            await self._credential.close()
+            self._credential = None
+    
     def get_tools(self) -> dict[str, dict]:
-        """Return all Azure tools."""
-        return {
+        """Return all Azure tools (built once per instance)."""
+        if self._tools is not None:
+            return self._tools
+        self._tools = {
             "azure_vm_list": {
                 "description": "List all VMs in a resource group or subscription",
                 "input_schema": {
@@ -60,6 +193,11 @@ class AzureTools:
                             "type": "string",
                             "description": "Resource group name (optional, lists all if not provided)",
                         },
+                        "no_cache": {
+                            "type": "boolean",
+                            "description": "Bypass the short-lived cache and query Azure directly",
+                            "default": False,
+                        },
                     },
                 },
                 "handler": self.list_vms,
@@ -95,6 +233,11 @@ class AzureTools:
                     "properties": {
                         "resource_group": {"type": "string", "description": "Resource group name"},
                         "vm_name": {"type": "string", "description": "VM name"},
+                        "no_cache": {
+                            "type": "boolean",
+                            "description": "Bypass the short-lived cache and query Azure directly",
+                            "default": False,
+                        },
                     },
                     "required": ["resource_group", "vm_name"],
                 },
@@ -175,46 +318,76 @@ class AzureTools:
                 "handler": self.set_secret,
             },
         }
+        return self._tools
     
-    async def list_vms(self, resource_group: Optional[str] = None) -> dict:
+    async def list_vms(self, resource_group: Optional[str] = None, no_cache: bool = False) -> dict:
         """List VMs in a resource group or subscription."""
-        client = _get_compute_client()
+        cache_key = f"list_vms:{resource_group or ''}"
+        if not no_cache:
+            cached = self._vm_cache.get(cache_key)
+            if cached is not MISS:
+                return cached
+        
+        client = self._compute_client()
         
         if resource_group:
-            vms = client.virtual_machines.list(resource_group)
+            pager = client.virtual_machines.list(resource_group)
         else:
-            vms = client.virtual_machines.list_all()
+            pager = client.virtual_machines.list_all()
+        
+        # Each page is its own ARM read, so take a token per page fetched. continuation_token
+        # is None once the last page has been read, so no token is spent on the end check.
+        pages = pager.by_page()
+        vms = []
+        first = True
+        while first or pages.continuation_token is not None:
+            first = False
+            await self._throttle("read")
+            try:
+                page = await pages.__anext__()
+            except StopAsyncIteration:
+                break
+            # Resolve each VM's resource group once while paging
+            vms.extend([(vm, _rg_of(vm.id)) async for vm in page])
+        
+        # Fetch instance views (power state) concurrently, within ARM throttling limits
+        sem = asyncio.Semaphore(INSTANCE_VIEW_CONCURRENCY)
+        
+        async def _instance_view(vm, vm_rg):
+            async with sem:
+                await self._throttle("read")
+                return await client.virtual_machines.instance_view(
+                    resource_group or vm_rg,
+                    vm.name
+                )
+        
+        views = await asyncio.gather(*(_instance_view(vm, vm_rg) for vm, vm_rg in vms))
         
         result = []
-        for vm in vms:
-            # Get instance view for power state
-            instance_view = client.virtual_machines.instance_view(
-                resource_group or vm.id.split("/")[4],
-                vm.name
-            )
-            power_state = "unknown"
-            for status in instance_view.statuses:
-                if status.code.startswith("PowerState/"):
-                    power_state = status.code.replace("PowerState/", "")
-                    break
-            
+        for (vm, vm_rg), instance_view in zip(vms, views):
+            power_state, _ = _vm_states(instance_view)
             result.append({
                 "name": vm.name,
-                "resource_group": vm.id.split("/")[4],
+                "resource_group": vm_rg,
                 "location": vm.location,
                 "vm_size": vm.hardware_profile.vm_size,
                 "power_state": power_state,
                 "os_type": vm.storage_profile.os_disk.os_type,
             })
         
-        return {"vms": result, "count": len(result)}
+        response = {"vms": result, "count": len(result)}
+        if VM_CACHE_TTL:
+            self._vm_cache.set(cache_key, response, VM_CACHE_TTL)
+        return response
     
     async def start_vm(self, resource_group: str, vm_name: str) -> dict:
         """Start an Azure VM."""
-        client = _get_compute_client()
+        client = self._compute_client()
         
         # Start the VM (async operation)
-        poller = client.virtual_machines.begin_start(resource_group, vm_name)
+        await self._throttle("write")
+        poller = await client.virtual_machines.begin_start(resource_group, vm_name)
+        self._invalidate_vm(resource_group, vm_name)
         
         return {
             "status": "starting",
@@ -225,10 +398,12 @@ class AzureTools:
     
     async def stop_vm(self, resource_group: str, vm_name: str) -> dict:
         """Stop (deallocate) an Azure VM."""
-        client = _get_compute_client()
+        client = self._compute_client()
         
         # Deallocate the VM (stops billing)
-        poller = client.virtual_machines.begin_deallocate(resource_group, vm_name)
+        await self._throttle("write")
+        poller = await client.virtual_machines.begin_deallocate(resource_group, vm_name)
+        self._invalidate_vm(resource_group, vm_name)
         
         return {
             "status": "stopping",
@@ -237,41 +412,46 @@ class AzureTools:
             "message": f"VM {vm_name} is deallocating. Billing will stop once complete.",
         }
     
-    async def get_vm_status(self, resource_group: str, vm_name: str) -> dict:
+    async def get_vm_status(self, resource_group: str, vm_name: str, no_cache: bool = False) -> dict:
         """Get VM power state."""
-        client = _get_compute_client()
+        cache_key = f"vm_status:{resource_group}:{vm_name}"
+        if not no_cache:
+            cached = self._vm_cache.get(cache_key)
+            if cached is not MISS:
+                return cached
         
-        instance_view = client.virtual_machines.instance_view(resource_group, vm_name)
+        client = self._compute_client()
         
-        power_state = "unknown"
-        provisioning_state = "unknown"
+        await self._throttle("read")
+        instance_view = await client.virtual_machines.instance_view(resource_group, vm_name)
         
-        for status in instance_view.statuses:
-            if status.code.startswith("PowerState/"):
-                power_state = status.code.replace("PowerState/", "")
-            elif status.code.startswith("ProvisioningState/"):
-                provisioning_state = status.code.replace("ProvisioningState/", "")
+        power_state, provisioning_state = _vm_states(instance_view)
         
-        return {
+        response = {
             "vm_name": vm_name,
             "resource_group": resource_group,
             "power_state": power_state,
             "provisioning_state": provisioning_state,
         }
+        if VM_CACHE_TTL:
+            self._vm_cache.set(cache_key, response, VM_CACHE_TTL)
+        return response
     
     async def run_command(self, resource_group: str, vm_name: str, command: str) -> dict:
         """Run a shell command on an Azure VM."""
-        client = _get_compute_client()
+        client = self._compute_client()
         
         run_command_input = {
             "command_id": "RunShellScript",
             "script": [command],
         }
         
-        poller = client.virtual_machines.begin_run_command(
+        await self._throttle("write")
+        poller = await client.virtual_machines.begin_run_command(
             resource_group, vm_name, run_command_input
         )
-        result = poller.result()
+        result = await poller.result()
+        self._invalidate_vm(resource_group, vm_name)
         
         output = ""
         if result.value:
@@ -313,12 +493,9 @@ class AzureTools:
     
     async def get_secret(self, vault_name: str, secret_name: str) -> dict:
         """Get a secret from Key Vault."""
-        from azure.keyvault.secrets import SecretClient
+        client = self._secret_client(vault_name)
         
-        vault_url = f"https://{vault_name}.vault.azure.net"
-        client = SecretClient(vault_url=vault_url, credential=_get_azure_credential())
-        
-        secret = client.get_secret(secret_name)
+        secret = await client.get_secret(secret_name)
         
         return {
             "vault_name": vault_name,
@@ -330,12 +507,9 @@ class AzureTools:
     
     async def set_secret(self, vault_name: str, secret_name: str, secret_value: str) -> dict:
         """Set a secret in Key Vault."""
-        from azure.keyvault.secrets import SecretClient
-        
-        vault_url = f"https://{vault_name}.vault.azure.net"
-        client = SecretClient(vault_url=vault_url, credential=_get_azure_credential())
+        client = self._secret_client(vault_name)
         
-        secret = client.set_secret(secret_name, secret_value)
+        secret = await client.set_secret(secret_name, secret_value)
         
         return {
             "vault_name": vault_name,
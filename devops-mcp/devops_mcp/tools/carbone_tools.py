@@ -6,33 +6,109 @@ Supports Word, Excel, PowerPoint, PDF, and more.
 """
 
 import os
-import json
 import base64
+import asyncio
+import hashlib
+import time
 import httpx
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
+from ..cache import coalesce, make_key
+from ..serialization import dumps_bytes
+
+# Template file extensions Carbone can render from
+TEMPLATE_EXTS = ('.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp')
+
+# Max age of a cached template listing (seconds)
+LISTING_TTL = 60
+
+# How long to wait for a cloud render to become downloadable (seconds)
+RENDER_TIMEOUT = float(os.environ.get("CARBONE_RENDER_TIMEOUT", "60"))
+
+# Read size when streaming rendered documents to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Max renders in flight per batch_render call
+BATCH_CONCURRENCY = int(os.environ.get("CARBONE_BATCH_CONCURRENCY", "8"))
+
+# How long an uploaded template ID is reused before re-uploading (seconds)
+TEMPLATE_ID_TTL = int(os.environ.get("CARBONE_TEMPLATE_TTL", "3600"))
+
+
+def _walk_templates(root: str):
+    """Yield DirEntry objects for template files under root (recursive, no symlinked dirs)."""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_templates(entry.path)
+            elif entry.name.endswith(TEMPLATE_EXTS) and entry.is_file():
+                yield entry
+
 
 class CarboneTools:
     """Carbone document generation tools."""
     
+    # Map report types to templates
+    REPORT_TEMPLATES = {
+        "monthly_flows": "reports/monthly_flows_report",
+        "quarterly_summary": "reports/quarterly_summary",
+        "platform_comparison": "reports/platform_comparison",
+        "client_board_pack": "reports/board_pack",
+        "data_quality": "reports/data_quality",
+    }
+    
     def __init__(self):
         # Carbone can be self-hosted or use cloud API
         self.api_url = os.environ.get("CARBONE_API_URL", "https://api.carbone.io")
         self.api_key = os.environ.get("CARBONE_API_KEY")
         self.templates_dir = os.environ.get("CARBONE_TEMPLATES_DIR", "./templates")
+        self._http: Optional[httpx.AsyncClient] = None
+        self._tools: Optional[dict[str, dict]] = None
+        # sha256 of template bytes -> (Carbone template ID, expires_at)
+        self._tpl_cache: dict[str, tuple[str, float]] = {}
+        # name/relative path -> full path, see _index()
+        self._template_index: Optional[dict[str, str]] = None
+        self._index_mtime = 0.0
+        self._index_checked_at = 0.0
+        self._index_built_at = 0.0
+        # render key -> future of the render currently producing it
+        self._inflight: dict[str, asyncio.Future] = {}
+        # category -> (templates dir mtime, expires_at, listing)
+        self._listing_cache: dict[Optional[str], tuple[float, float, dict]] = {}
     
     def is_configured(self) -> bool:
         return bool(self.api_key) or os.path.exists(self.templates_dir)
     
     def _headers(self):
-        headers = {"Content-Type": "application/json"}
+        # Content-Type is set per request (JSON bodies vs multipart template uploads)
+        headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
     
+    async def _client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for the Carbone API (created on first use)."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.api_url,
+                headers=self._headers(),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                timeout=60,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     def get_tools(self) -> dict[str, dict]:
-        return {
+        if self._tools is not None:
+            return self._tools
+        self._tools = {
             "carbone_render": {
                 "description": "Render a document from a Carbone template with data",
                 "input_schema": {
@@ -123,6 +199,7 @@ class CarboneTools:
                 "handler": self.batch_render,
             },
         }
+        return self._tools
     
     async def render(
         self,
@@ -130,75 +207,160 @@ class CarboneTools:
         data: dict,
         output_format: str = "pdf",
         output_path: Optional[str] = None,
+        encode_base64: bool = True,
     ) -> dict:
-        """Render a document from template."""
+        """Render a document from template.
+        
+        Without output_path the document is returned inline: base64 text for tool
+        results, or raw bytes under "content" when encode_base64 is False.
+        """
         
         # Find template file
         template_path = self._find_template(template)
         if not template_path:
             return {"error": f"Template not found: {template}"}
         
-        # Read template
-        with open(template_path, "rb") as f:
-            template_content = base64.b64encode(f.read()).decode()
-        
+        # Identical renders already in flight share one pipeline
+        key = make_key("carbone_render", {
+            "template": template_path,
+            "data": data,
+            "output_format": output_format,
+            "output_path": output_path,
+            "encode_base64": encode_base64,
+        })
+        return await coalesce(
+            self._inflight,
+            key,
+            lambda: self._render(template_path, data, output_format, output_path, encode_base64),
+        )
+    
+    async def _render(
+        self,
+        template_path: str,
+        data: dict,
+        output_format: str,
+        output_path: Optional[str],
+        encode_base64: bool,
+    ) -> dict:
+        """Render a resolved template via the cloud API or the local CLI."""
         # If using Carbone Cloud API
         if self.api_key:
-            return await self._render_cloud(template_content, data, output_format, output_path)
+            # Read template off the event loop
+            template_bytes = await asyncio.to_thread(Path(template_path).read_bytes)
+            try:
+                template_id = await self._cloud_template_id(template_bytes, os.path.basename(template_path))
+            except (httpx.HTTPError, ValueError) as e:
+                return {"status": "error", "error": f"Template upload failed: {e}"}
+            return await self._render_cloud(
+                template_id, data, output_format, output_path, encode_base64
+            )
         
         # If using local Carbone (carbone-copy-paste or carbone CLI)
         return await self._render_local(template_path, data, output_format, output_path)
     
+    async def _cloud_template_id(self, template_bytes: bytes, filename: str) -> str:
+        """Upload a template to Carbone Cloud, reusing the ID of identical content.
+        
+        Raises httpx.HTTPStatusError on an error response and ValueError when no ID comes back.
+        """
+        digest = hashlib.sha256(template_bytes).hexdigest()
+        cached = self._tpl_cache.get(digest)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        
+        client = await self._client()
+        # Send raw bytes as multipart rather than base64 inside JSON
+        resp = await client.post(
+            "/template",
+            files={"template": (filename, template_bytes, "application/octet-stream")},
+        )
+        resp.raise_for_status()
+        result = resp.json()
+        template_id = result.get("data", {}).get("templateId")
+        if not template_id:
+            raise ValueError(result.get("error") or "Carbone returned no templateId")
+        self._tpl_cache[digest] = (template_id, time.monotonic() + TEMPLATE_ID_TTL)
+        return template_id
+    
     async def _render_cloud(
         self,
-        template_base64: str,
+        template_id: str,
         data: dict,
         output_format: str,
         output_path: Optional[str],
+        encode_base64: bool = True,
     ) -> dict:
         """Render using Carbone Cloud API."""
         
-        async with httpx.AsyncClient() as client:
-            # Upload template
-            resp = await client.post(
-                f"{self.api_url}/template",
-                headers=self._headers(),
-                json={"template": template_base64}
-            )
-            template_id = resp.json().get("data", {}).get("templateId")
-            
-            # Render document
-            resp = await client.post(
-                f"{self.api_url}/render/{template_id}",
-                headers=self._headers(),
-                json={
-                    "data": data,
-                    "convertTo": output_format,
-                }
-            )
-            render_result = resp.json()
-            render_id = render_result.get("data", {}).get("renderId")
-            
-            # Download rendered document
-            resp = await client.get(
-                f"{self.api_url}/render/{render_id}",
-                headers=self._headers(),
-            )
-            
-            if output_path:
-                with open(output_path, "wb") as f:
-                    f.write(resp.content)
-                return {
-                    "status": "success",
-                    "output_path": output_path,
-                    "format": output_format,
-                }
-            else:
+        client = await self._client()
+        
+        # Render document
+        resp = await client.post(
+            f"/render/{template_id}",
+            content=dumps_bytes({
+                "data": data,
+                "convertTo": output_format,
+            }),
+            headers={"Content-Type": "application/json"},
+        )
+        render_result = resp.json()
+        render_id = render_result.get("data", {}).get("renderId")
+        if not render_id:
+            return {
+                "status": "error",
+                "error": render_result.get("error") or f"Render request failed ({resp.status_code})",
+            }
+        
+        # Download rendered document, backing off while Carbone is still rendering.
+        # Streamed so only one chunk per render is held in memory when writing to disk.
+        deadline = time.monotonic() + RENDER_TIMEOUT
+        delay = 0.1
+        while True:
+            async with client.stream("GET", f"/render/{render_id}") as resp:
+                if resp.status_code == 200:
+                    if output_path:
+                        # Disk writes run in a worker thread to keep the loop free. The download
+                        # lands in a sibling temp file that replaces output_path only when complete.
+                        tmp_path = f"{output_path}.{os.getpid()}.{id(resp):x}.part"
+                        f = await asyncio.to_thread(open, tmp_path, "wb")
+                        try:
+                            try:
+                                async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                                    await asyncio.to_thread(f.write, chunk)
+                            finally:
+                                await asyncio.to_thread(f.close)
+                            await asyncio.to_thread(os.replace, tmp_path, output_path)
+                        except BaseException:
+                            await asyncio.to_thread(Path(tmp_path).unlink, missing_ok=True)
+                            raise
+                        return {
+                            "status": "success",
+                            "output_path": output_path,
+                            "format": output_format,
+                        }
+                    content = await resp.aread()
+                    break
+                if resp.status_code not in (202, 404):
+                    resp.raise_for_status()
+            if time.monotonic() + delay > deadline:
                 return {
-                    "status": "success",
-                    "content_base64": base64.b64encode(resp.content).decode(),
-                    "format": output_format,
+                    "status": "error",
+                    "error": f"Render {render_id} not ready after {RENDER_TIMEOUT}s",
                 }
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 3.2)
+        
+        if not encode_base64:
+            return {
+                "status": "success",
+                "content": content,
+                "format": output_format,
+            }
+        return {
+            "status": "success",
+            "content_base64": base64.b64encode(content).decode(),
+            "format": output_format,
+        }
     
     async def _render_local(
         self,
@@ -208,12 +370,11 @@ class CarboneTools:
         output_path: Optional[str],
     ) -> dict:
         """Render using local Carbone installation."""
-        import subprocess
         import tempfile
         
         # Write data to temp file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(data, f)
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as f:
+            f.write(dumps_bytes(data))
             data_path = f.name
         
         # Determine output path
@@ -221,20 +382,19 @@ class CarboneTools:
             output_path = tempfile.mktemp(suffix=f'.{output_format}')
         
         try:
-            # Run carbone CLI
-            result = subprocess.run(
-                [
-                    "carbone", "render",
-                    template_path,
-                    data_path,
-                    "-o", output_path,
-                    "-f", output_format,
-                ],
-                capture_output=True,
-                text=True,
+            # Run carbone CLI without blocking the event loop
+            proc = await asyncio.create_subprocess_exec(
+                "carbone", "render",
+                template_path,
+                data_path,
+                "-o", output_path,
+                "-f", output_format,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
+            _, stderr = await proc.communicate()
             
-            if result.returncode == 0:
+            if proc.returncode == 0:
                 return {
                     "status": "success",
                     "output_path": output_path,
@@ -243,11 +403,48 @@ class CarboneTools:
             else:
                 return {
                     "status": "error",
-                    "error": result.stderr,
+                    "error": stderr.decode(errors="replace"),
                 }
         finally:
             os.unlink(data_path)
     
+    def _build_index(self, root: str) -> dict[str, str]:
+        """Map relative paths (with and without extension), file names and stems to full paths."""
+        entries = sorted(
+            _walk_templates(root),
+            key=lambda e: TEMPLATE_EXTS.index(os.path.splitext(e.name)[1]),
+        )
+        index: dict[str, str] = {}
+        # Relative paths take precedence over bare names found in subfolders
+        for entry in entries:
+            rel = os.path.relpath(entry.path, root)
+            index.setdefault(rel, entry.path)
+            index.setdefault(os.path.splitext(rel)[0], entry.path)
+        for entry in entries:
+            index.setdefault(entry.name, entry.path)
+            index.setdefault(os.path.splitext(entry.name)[0], entry.path)
+        return index
+    
+    def _index(self, refresh: bool = False) -> dict[str, str]:
+        """Template index, rebuilt when the templates dir mtime changes (checked at most once a second)."""
+        now = time.monotonic()
+        if not refresh and self._template_index is not None and now - self._index_checked_at < 1:
+            return self._template_index
+        
+        root = self.templates_dir
+        try:
+            mtime = os.stat(root).st_mtime
+        except OSError:
+            self._template_index = None
+            return {}
+        
+        if refresh or self._template_index is None or mtime != self._index_mtime:
+            self._template_index = self._build_index(root)
+            self._index_mtime = mtime
+            self._index_built_at = now
+        self._index_checked_at = now
+        return self._template_index
+    
     def _find_template(self, template: str) -> Optional[str]:
         """Find template file by name or path."""
         # Direct path
@@ -255,20 +452,11 @@ class CarboneTools:
             return template
         
         # In templates directory
-        templates_dir = Path(self.templates_dir)
-        if templates_dir.exists():
-            # Exact match
-            for ext in ['.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp']:
-                path = templates_dir / f"{template}{ext}"
-                if path.exists():
-                    return str(path)
-            
-            # Search subdirectories
-            for path in templates_dir.rglob(f"{template}*"):
-                if path.is_file():
-                    return str(path)
-        
-        return None
+        path = self._index().get(os.path.normpath(template))
+        if path is None and time.monotonic() - self._index_built_at >= 1:
+            # Root mtime misses files added in nested folders; rescan once on a miss
+            path = self._index(refresh=True).get(os.path.normpath(template))
+        return path
     
     async def list_templates(self, category: Optional[str] = None) -> dict:
         """List available templates."""
@@ -277,19 +465,30 @@ class CarboneTools:
         if not templates_dir.exists():
             return {"templates": [], "error": "Templates directory not found"}
         
+        root = str(templates_dir)
+        mtime = os.stat(root).st_mtime
+        cached = self._listing_cache.get(category)
+        # Root mtime misses edits in nested folders, so also bound the entry's age
+        if cached and cached[0] == mtime and cached[1] > time.monotonic():
+            return cached[2]
+        
+        search_dir = os.path.join(root, category) if category else root
         templates = []
-        search_dir = templates_dir / category if category else templates_dir
         
-        for path in search_dir.rglob("*"):
-            if path.is_file() and path.suffix in ['.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp']:
+        if os.path.isdir(search_dir):
+            for entry in _walk_templates(search_dir):
+                parent = os.path.dirname(entry.path)
+                stem, ext = os.path.splitext(entry.name)
                 templates.append({
-                    "name": path.stem,
-                    "path": str(path.relative_to(templates_dir)),
-                    "type": path.suffix[1:],
-                    "category": path.parent.name if path.parent != templates_dir else None,
+                    "name": stem,
+                    "path": os.path.relpath(entry.path, root),
+                    "type": ext[1:],
+                    "category": os.path.basename(parent) if parent != root else None,
                 })
         
-        return {"templates": templates, "count": len(templates)}
+        result = {"templates": templates, "count": len(templates)}
+        self._listing_cache[category] = (mtime, time.monotonic() + LISTING_TTL, result)
+        return result
     
     async def upload_template(self, file_path: str, template_name: Optional[str] = None) -> dict:
         """Upload/copy a template to the templates directory."""
@@ -307,7 +506,9 @@ class CarboneTools:
             dest_name += source.suffix
         
         dest = templates_dir / dest_name
-        shutil.copy2(source, dest)
+        await asyncio.to_thread(shutil.copy2, source, dest)
+        self._listing_cache.clear()
+        self._template_index = None
         
         return {
             "status": "uploaded",
@@ -325,16 +526,7 @@ class CarboneTools:
     ) -> dict:
         """Render a pre-configured FlowMetrics report."""
         
-        # Map report types to templates
-        template_map = {
-            "monthly_flows": "reports/monthly_flows_report",
-            "quarterly_summary": "reports/quarterly_summary",
-            "platform_comparison": "reports/platform_comparison",
-            "client_board_pack": "reports/board_pack",
-            "data_quality": "reports/data_quality",
-        }
-        
-        template = template_map.get(report_type)
+        template = self.REPORT_TEMPLATES.get(report_type)
         if not template:
             return {"error": f"Unknown report type: {report_type}"}
         
@@ -342,7 +534,7 @@ class CarboneTools:
         report_data = {
             "client_id": client_id,
             "period": period,
-            "generated_at": __import__('datetime').datetime.now().isoformat(),
+            "generated_at": datetime.now().isoformat(),
             "report_type": report_type,
             **(data or {}),
         }
@@ -370,28 +562,52 @@ class CarboneTools:
         output_dir = output_dir or "/tmp/batch_render"
         os.makedirs(output_dir, exist_ok=True)
         
-        results = []
-        for i, data in enumerate(data_list):
-            # Generate filename
-            filename = filename_template.format(index=i, **data)
-            if not filename.endswith(f'.{output_format}'):
-                filename += f'.{output_format}'
-            
-            output_path = os.path.join(output_dir, filename)
-            
-            result = await self.render(
-                template=template,
-                data=data,
-                output_format=output_format,
-                output_path=output_path,
-            )
+        # Upload the template once for the whole batch
+        template_id = None
+        if self.api_key:
+            template_path = self._find_template(template)
+            if not template_path:
+                return {"error": f"Template not found: {template}"}
+            template_bytes = await asyncio.to_thread(Path(template_path).read_bytes)
+            try:
+                template_id = await self._cloud_template_id(template_bytes, os.path.basename(template_path))
+            except (httpx.HTTPError, ValueError) as e:
+                # Every item would fail the same way, so stop before rendering any
+                return {"error": f"Template upload failed: {e}"}
+        
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def _one(i: int, data: dict) -> dict:
+            filename = None
+            try:
+                # Generate filename; a placeholder missing from this item's data fails only this item
+                filename = filename_template.format(index=i, **data)
+                if not filename.endswith(f'.{output_format}'):
+                    filename += f'.{output_format}'
+                
+                output_path = os.path.join(output_dir, filename)
+                
+                async with sem:
+                    if self.api_key:
+                        result = await self._render_cloud(template_id, data, output_format, output_path)
+                    else:
+                        result = await self.render(
+                            template=template,
+                            data=data,
+                            output_format=output_format,
+                            output_path=output_path,
+                        )
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
             
-            results.append({
+            return {
                 "index": i,
                 "filename": filename,
                 "status": result.get("status"),
                 "error": result.get("error"),
-            })
+            }
+        
+        results = await asyncio.gather(*(_one(i, data) for i, data in enumerate(data_list)))
         
         success_count = sum(1 for r in results if r["status"] == "success")
         
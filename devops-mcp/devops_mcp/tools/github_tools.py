@@ -5,189 +5,691 @@ Tools for managing GitHub repositories, PRs, issues, and actions.
 """
 
 import os
-from typing import Any, Optional, List
+import re
+import hashlib
+import posixpath
+import asyncio
+import logging
+import random
+import time
+import importlib.util
+import httpx
+from datetime import datetime
+from urllib.parse import quote
+from typing import Any, Callable, Optional, List
 
+from ..cache import TTLCache, MISS, cached, make_key
+from ..serialization import dumps_bytes, loads
 
-class GitHubTools:
-    """GitHub management tools."""
+GITHUB_API_URL = "https://api.github.com"
+
+# Attempts per async API call before a rate-limit/5xx response is returned to the caller
+REQUEST_ATTEMPTS = 5
+
+logger = logging.getLogger("devops-mcp.github")
+
+# How long an ETag and its parsed response are kept for If-None-Match revalidation (seconds)
+ETAG_TTL = 3600
+
+# Upper bound on the response bytes held for ETag revalidation; least recently used go first
+ETAG_CACHE_BYTES = 16 * 1024 * 1024
+
+REPO_DETAILS_FRAGMENT = """
+fragment RepoDetails on Repository {
+  name
+  nameWithOwner
+  description
+  isPrivate
+  defaultBranchRef { name }
+  primaryLanguage { name }
+  stargazerCount
+  forkCount
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+  createdAt
+  updatedAt
+  url
+}
+"""
+
+REPO_INFO_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) { ...RepoDetails }
+}
+""" + REPO_DETAILS_FRAGMENT
+
+PR_LIST_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $states: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $first, states: $states, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        title
+        state
+        author { login }
+        createdAt
+        updatedAt
+        headRefName
+        baseRefName
+        isDraft
+        mergeable
+      }
+    }
+  }
+}
+"""
+
+# github_pr_list "state" -> GraphQL pull request states (None = all)
+PR_STATES = {
+    "open": ["OPEN"],
+    "closed": ["CLOSED", "MERGED"],
+    "all": None,
+}
+
+# GraphQL MergeableState -> REST "mergeable"
+MERGEABLE = {"MERGEABLE": True, "CONFLICTING": False}
+
+REPO_LIST_FRAGMENT = """
+fragment RepoInfo on Repository {
+  name
+  nameWithOwner
+  isPrivate
+  defaultBranchRef { name }
+  updatedAt
+}
+"""
+
+VIEWER_REPOS_QUERY = """
+query($affiliations: [RepositoryAffiliation]) {
+  viewer {
+    login
+    repositories(first: 50, affiliations: $affiliations, ownerAffiliations: $affiliations,
+                 orderBy: {field: NAME, direction: ASC}) {
+      nodes { ...RepoInfo }
+    }
+  }
+}
+""" + REPO_LIST_FRAGMENT
+
+OWNER_REPOS_QUERY = """
+query($login: String!, $affiliations: [RepositoryAffiliation]) {
+  repositoryOwner(login: $login) {
+    repositories(first: 50, ownerAffiliations: $affiliations,
+                 orderBy: {field: NAME, direction: ASC}) {
+      nodes { ...RepoInfo }
+    }
+  }
+}
+""" + REPO_LIST_FRAGMENT
+
+# github_repo_list "type" -> GraphQL repository affiliations
+REPO_AFFILIATIONS = {
+    "all": ["OWNER", "COLLABORATOR", "ORGANIZATION_MEMBER"],
+    "owner": ["OWNER"],
+    "member": ["COLLABORATOR", "ORGANIZATION_MEMBER"],
+}
+
+
+# PyGithub client (lazy loaded, one per process so its connection pool stays warm)
+_github_client = None
+
+# Sized for concurrent handler threads
+GITHUB_POOL_SIZE = 32
+
+# Blocking httpx client behind PyGithub, see _HttpxConnection
+_sync_http: Optional[httpx.Client] = None
+
+# Multiplex concurrent requests over one connection when h2 is installed (devops-mcp[perf])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Failures raised before the request reached GitHub, so retrying can't repeat a write
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class _HttpxResponse:
+    """Mimics the response object PyGithub's Requester reads."""
     
-    def __init__(self):
-        self.token = os.environ.get("GITHUB_TOKEN")
-        self._client = None
+    def __init__(self, resp: httpx.Response):
+        self.status = resp.status_code
+        self.headers = resp.headers
+        self.response = resp
     
-    def is_configured(self) -> bool:
-        """Check if GitHub is properly configured."""
-        return bool(self.token)
+    def getheaders(self):
+        return self.headers.items()
     
-    def _get_client(self):
-        """Get GitHub client (lazy loaded)."""
-        if self._client is None:
-            from github import Github
-            self._client = Github(self.token)
-        return self._client
+    def read(self) -> str:
+        return self.response.text
     
-    def get_tools(self) -> dict[str, dict]:
-        """Return all GitHub tools."""
-        return {
-            "github_repo_list": {
-                "description": "List repositories for a user or organization",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "User or org name (default: authenticated user)"},
-                        "type": {"type": "string", "enum": ["all", "owner", "member"], "default": "all"},
-                    },
-                },
-                "handler": self.list_repos,
+    def iter_content(self, chunk_size: Optional[int] = 1):
+        return self.response.iter_bytes(chunk_size)
+    
+    def raise_for_status(self) -> None:
+        self.response.raise_for_status()
+
+
+class _HttpxConnection:
+    """PyGithub connection class that sends every request through one shared httpx.Client.
+    
+    Installed with Requester.injectConnectionClasses, so PyGithub's models and pagination
+    are unchanged while all handler threads share a single keep-alive pool.
+    """
+    
+    def __init__(self, host: str, port: Optional[int] = None, strict: bool = False,
+                 timeout: Optional[float] = None, retry: Any = None, pool_size: Optional[int] = None,
+                 **kwargs):
+        self.host = host
+        self.port = port or 443
+        self.timeout = timeout
+        self.retry = retry
+    
+    def request(self, verb: str, url: str, input: Any, headers: dict, stream: bool = False):
+        self.verb = verb
+        self.url = url
+        # Uploads arrive as open files; read once so a retry can resend the body
+        self.input = input.read() if hasattr(input, "read") else input
+        self.headers = headers
+    
+    def getresponse(self) -> _HttpxResponse:
+        global _sync_http
+        if _sync_http is None:
+            _sync_http = httpx.Client(
+                limits=httpx.Limits(max_connections=GITHUB_POOL_SIZE, max_keepalive_connections=GITHUB_POOL_SIZE),
+                http2=HTTP2,
+            )
+        attempts = getattr(self.retry, "total", None) or 0
+        backoff = getattr(self.retry, "backoff_factor", 0)
+        retry_statuses = set(getattr(self.retry, "status_forcelist", None) or ())
+        allowed_methods = getattr(self.retry, "allowed_methods", None)
+        
+        for attempt in range(attempts + 1):
+            try:
+                resp = _sync_http.request(
+                    self.verb,
+                    f"https://{self.host}:{self.port}{self.url}",
+                    headers=self.headers,
+                    content=self.input,
+                    timeout=self.timeout,
+                )
+            except httpx.TransportError as e:
+                # Like urllib3's Retry: connection failures always retry, read failures only
+                # for methods the retry policy allows
+                retryable = isinstance(e, _CONNECT_ERRORS) or not allowed_methods or self.verb in allowed_methods
+                if attempt == attempts or not retryable:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+                continue
+            status = resp.status_code
+            retry_after = resp.headers.get("retry-after")
+            retryable = status in retry_statuses
+            if status == 403:
+                # Like GithubRetry: only a rate-limit 403 is worth retrying
+                retryable = retryable and bool(retry_after or resp.headers.get("x-ratelimit-remaining") == "0")
+            if attempt == attempts or not retryable:
+                break
+            resp.close()
+            time.sleep(min(60, float(retry_after) if retry_after else backoff * 2 ** attempt))
+        return _HttpxResponse(resp)
+    
+    def close(self) -> None:
+        # The shared client outlives each Requester connection
+        pass
+
+
+def _get_github_client(token: Optional[str]):
+    """Get the shared PyGithub client."""
+    global _github_client
+    if _github_client is None:
+        from github import Auth, Github
+        from github.GithubRetry import GithubRetry
+        from github.Requester import Requester
+        Requester.injectConnectionClasses(_HttpxConnection, _HttpxConnection)
+        _github_client = Github(
+            auth=Auth.Token(token) if token else None,
+            # 100 items per page (the API max) instead of 30 cuts list round-trips ~3x
+            per_page=100,
+            # GithubRetry only retries a 403 when it is a rate limit, honoring Retry-After
+            retry=GithubRetry(total=3, backoff_factor=0.3, status_forcelist=[403, 429, 502, 503, 504]),
+            pool_size=GITHUB_POOL_SIZE,
+        )
+    return _github_client
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    """ISO 8601 string for a PyGithub datetime (None passes through)."""
+    return dt and dt.isoformat()
+
+
+def _repo_details(r: dict) -> dict:
+    """Shape a RepoDetails GraphQL node like the REST repository summary."""
+    return {
+        "name": r["name"],
+        "full_name": r["nameWithOwner"],
+        "description": r["description"],
+        "private": r["isPrivate"],
+        "default_branch": (r["defaultBranchRef"] or {}).get("name"),
+        "language": (r["primaryLanguage"] or {}).get("name"),
+        "stars": r["stargazerCount"],
+        "forks": r["forkCount"],
+        # REST open_issues_count includes open pull requests
+        "open_issues": r["issues"]["totalCount"] + r["pullRequests"]["totalCount"],
+        "created_at": r["createdAt"],
+        "updated_at": r["updatedAt"],
+        "clone_url": f"{r['url']}.git",
+    }
+
+
+# Full commit SHA (immutable ref, safe to cache file contents against)
+_SHA_RE = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+class TokenPool:
+    """Rotates requests across GitHub tokens using the rate-limit headers of each response."""
+    
+    # Longest we wait for a window reset when every token is exhausted (seconds)
+    MAX_WAIT = 60
+    
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        # (token, resource) -> (remaining, reset epoch seconds)
+        self._state: dict[tuple[str, str], tuple[int, float]] = {}
+        self._next = 0
+    
+    def _remaining(self, token: str, resource: str, now: float) -> float:
+        remaining, reset = self._state.get((token, resource), (None, 0.0))
+        # Unknown, or the window has rolled over since we last saw it
+        if remaining is None or reset <= now:
+            return float("inf")
+        return remaining
+    
+    async def pick(self, resource: str = "core") -> Optional[str]:
+        """Return the token with the most budget left, starting the scan round-robin."""
+        if not self.tokens:
+            return None
+        now = time.time()
+        count = len(self.tokens)
+        order = [self.tokens[(self._next + i) % count] for i in range(count)]
+        self._next = (self._next + 1) % count
+        best = max(order, key=lambda t: self._remaining(t, resource, now))
+        if self._remaining(best, resource, now) > 0:
+            return best
+        
+        # All exhausted: wait for the earliest reset, within reason
+        reset = min(self._state[(t, resource)][1] for t in order)
+        await asyncio.sleep(min(max(0.0, reset - now), self.MAX_WAIT))
+        return best
+    
+    def update(self, token: Optional[str], headers: httpx.Headers, resource: str = "core"):
+        """Record a response's X-RateLimit-* headers against the token that made it."""
+        if token is None or "x-ratelimit-remaining" not in headers:
+            return
+        resource = headers.get("x-ratelimit-resource", resource)
+        self._state[(token, resource)] = (
+            int(headers["x-ratelimit-remaining"]),
+            float(headers.get("x-ratelimit-reset", 0)),
+        )
+
+
+# Tool descriptors built once at import; "handler" names the GitHubTools method bound in __init__
+_TOOL_SCHEMAS: dict[str, dict] = {
+    "github_repo_list": {
+        "description": "List repositories for a user or organization",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "User or org name (default: authenticated user)"},
+                "type": {"type": "string", "enum": ["all", "owner", "member"], "default": "all"},
             },
-            "github_repo_info": {
-                "description": "Get information about a repository",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                    },
-                    "required": ["owner", "repo"],
-                },
-                "handler": self.get_repo_info,
+        },
+        "handler": "list_repos",
+    },
+    "github_repo_info": {
+        "description": "Get information about a repository",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
             },
-            "github_pr_list": {
-                "description": "List pull requests for a repository",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "state": {"type": "string", "enum": ["open", "closed", "all"], "default": "open"},
-                        "limit": {"type": "integer", "description": "Max PRs to return", "default": 20},
-                    },
-                    "required": ["owner", "repo"],
+            "required": ["owner", "repo"],
+        },
+        "handler": "get_repo_info",
+    },
+    "github_repo_info_batch": {
+        "description": "Get information about several repositories in one call",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "repos": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "maxItems": 100,
+                    "description": "Repositories as owner/repo",
                 },
-                "handler": self.list_prs,
             },
-            "github_pr_create": {
-                "description": "Create a pull request",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "title": {"type": "string", "description": "PR title"},
-                        "body": {"type": "string", "description": "PR description"},
-                        "head": {"type": "string", "description": "Source branch"},
-                        "base": {"type": "string", "description": "Target branch", "default": "main"},
-                        "draft": {"type": "boolean", "description": "Create as draft", "default": False},
-                    },
-                    "required": ["owner", "repo", "title", "head"],
-                },
-                "handler": self.create_pr,
+            "required": ["repos"],
+        },
+        "handler": "get_repo_info_batch",
+    },
+    "github_pr_list": {
+        "description": "List pull requests for a repository",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "state": {"type": "string", "enum": ["open", "closed", "all"], "default": "open"},
+                "limit": {"type": "integer", "description": "Max PRs to return", "default": 20},
             },
-            "github_pr_merge": {
-                "description": "Merge a pull request",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "pr_number": {"type": "integer", "description": "PR number"},
-                        "merge_method": {"type": "string", "enum": ["merge", "squash", "rebase"], "default": "squash"},
-                    },
-                    "required": ["owner", "repo", "pr_number"],
-                },
-                "handler": self.merge_pr,
+            "required": ["owner", "repo"],
+        },
+        "handler": "list_prs",
+    },
+    "github_pr_create": {
+        "description": "Create a pull request",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "title": {"type": "string", "description": "PR title"},
+                "body": {"type": "string", "description": "PR description"},
+                "head": {"type": "string", "description": "Source branch"},
+                "base": {"type": "string", "description": "Target branch", "default": "main"},
+                "draft": {"type": "boolean", "description": "Create as draft", "default": False},
             },
-            "github_issue_list": {
-                "description": "List issues for a repository",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "state": {"type": "string", "enum": ["open", "closed", "all"], "default": "open"},
-                        "labels": {"type": "array", "items": {"type": "string"}, "description": "Filter by labels"},
-                        "limit": {"type": "integer", "description": "Max issues to return", "default": 20},
-                    },
-                    "required": ["owner", "repo"],
-                },
-                "handler": self.list_issues,
+            "required": ["owner", "repo", "title", "head"],
+        },
+        "handler": "create_pr",
+    },
+    "github_pr_merge": {
+        "description": "Merge a pull request",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "pr_number": {"type": "integer", "description": "PR number"},
+                "merge_method": {"type": "string", "enum": ["merge", "squash", "rebase"], "default": "squash"},
             },
-            "github_issue_create": {
-                "description": "Create an issue",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "title": {"type": "string", "description": "Issue title"},
-                        "body": {"type": "string", "description": "Issue body"},
-                        "labels": {"type": "array", "items": {"type": "string"}, "description": "Labels to add"},
-                        "assignees": {"type": "array", "items": {"type": "string"}, "description": "Assignees"},
-                    },
-                    "required": ["owner", "repo", "title"],
-                },
-                "handler": self.create_issue,
+            "required": ["owner", "repo", "pr_number"],
+        },
+        "handler": "merge_pr",
+    },
+    "github_issue_list": {
+        "description": "List issues for a repository",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "state": {"type": "string", "enum": ["open", "closed", "all"], "default": "open"},
+                "labels": {"type": "array", "items": {"type": "string"}, "description": "Filter by labels"},
+                "limit": {"type": "integer", "description": "Max issues to return", "default": 20},
             },
-            "github_actions_list": {
-                "description": "List recent workflow runs",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "workflow": {"type": "string", "description": "Workflow file name (optional)"},
-                        "status": {"type": "string", "enum": ["completed", "in_progress", "queued"]},
-                        "limit": {"type": "integer", "description": "Max runs to return", "default": 10},
-                    },
-                    "required": ["owner", "repo"],
-                },
-                "handler": self.list_workflow_runs,
+            "required": ["owner", "repo"],
+        },
+        "handler": "list_issues",
+    },
+    "github_issue_create": {
+        "description": "Create an issue",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "title": {"type": "string", "description": "Issue title"},
+                "body": {"type": "string", "description": "Issue body"},
+                "labels": {"type": "array", "items": {"type": "string"}, "description": "Labels to add"},
+                "assignees": {"type": "array", "items": {"type": "string"}, "description": "Assignees"},
             },
-            "github_actions_trigger": {
-                "description": "Trigger a workflow dispatch event",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "workflow": {"type": "string", "description": "Workflow file name"},
-                        "ref": {"type": "string", "description": "Branch or tag", "default": "main"},
-                        "inputs": {"type": "object", "description": "Workflow inputs"},
-                    },
-                    "required": ["owner", "repo", "workflow"],
-                },
-                "handler": self.trigger_workflow,
+            "required": ["owner", "repo", "title"],
+        },
+        "handler": "create_issue",
+    },
+    "github_actions_list": {
+        "description": "List recent workflow runs",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "workflow": {"type": "string", "description": "Workflow file name (optional)"},
+                "status": {"type": "string", "enum": ["completed", "in_progress", "queued"]},
+                "limit": {"type": "integer", "description": "Max runs to return", "default": 10},
             },
-            "github_branch_list": {
-                "description": "List branches for a repository",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                    },
-                    "required": ["owner", "repo"],
-                },
-                "handler": self.list_branches,
+            "required": ["owner", "repo"],
+        },
+        "handler": "list_workflow_runs",
+    },
+    "github_actions_trigger": {
+        "description": "Trigger a workflow dispatch event",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "workflow": {"type": "string", "description": "Workflow file name"},
+                "ref": {"type": "string", "description": "Branch or tag", "default": "main"},
+                "inputs": {"type": "object", "description": "Workflow inputs"},
             },
-            "github_file_content": {
-                "description": "Get content of a file from a repository",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "owner": {"type": "string", "description": "Repository owner"},
-                        "repo": {"type": "string", "description": "Repository name"},
-                        "path": {"type": "string", "description": "File path"},
-                        "ref": {"type": "string", "description": "Branch, tag, or commit", "default": "main"},
-                    },
-                    "required": ["owner", "repo", "path"],
-                },
-                "handler": self.get_file_content,
+            "required": ["owner", "repo", "workflow"],
+        },
+        "handler": "trigger_workflow",
+    },
+    "github_branch_list": {
+        "description": "List branches for a repository",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "limit": {"type": "integer", "description": "Max branches per page (up to 100)", "default": 100},
+                "cursor": {"type": "string", "description": "next_cursor from a previous call"},
+            },
+            "required": ["owner", "repo"],
+        },
+        "handler": "list_branches",
+    },
+    "github_file_content": {
+        "description": "Get content of a file from a repository",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "owner": {"type": "string", "description": "Repository owner"},
+                "repo": {"type": "string", "description": "Repository name"},
+                "path": {"type": "string", "description": "File path"},
+                "ref": {"type": "string", "description": "Branch, tag, or commit", "default": "main"},
             },
+            "required": ["owner", "repo", "path"],
+        },
+        "handler": "get_file_content",
+    },
+}
+
+
+class GitHubTools:
+    """GitHub management tools."""
+    
+    def __init__(self):
+        self.token = os.environ.get("GITHUB_TOKEN")
+        # GITHUB_TOKENS (comma-separated) spreads REST/GraphQL calls over several rate limits
+        tokens = [t.strip() for t in os.environ.get("GITHUB_TOKENS", "").split(",") if t.strip()]
+        self.token = self.token or (tokens[0] if tokens else None)
+        self._tokens = TokenPool(tokens or ([self.token] if self.token else []))
+        self._http: Optional[httpx.AsyncClient] = None
+        # Read results, see @cached; cleared whenever a handler writes to GitHub
+        self._cache = TTLCache(max_entries=512)
+        self._inflight: dict[str, asyncio.Future] = {}
+        # (etag, parsed result) per conditional GET, see _get_conditional; kept across writes
+        self._etags = TTLCache(max_entries=256, max_bytes=ETAG_CACHE_BYTES)
+        self._viewer_login: Optional[str] = None
+        self._tools = {
+            name: {**spec, "handler": getattr(self, spec["handler"])}
+            for name, spec in _TOOL_SCHEMAS.items()
         }
     
+    def is_configured(self) -> bool:
+        """Check if GitHub is properly configured."""
+        return bool(self.token)
+    
+    def _get_client(self):
+        """Get GitHub client (lazy loaded, shared process-wide)."""
+        return _get_github_client(self.token)
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        """Get the pooled async client for direct REST/GraphQL calls."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=GITHUB_API_URL,
+                headers={
+                    "Accept": "application/vnd.github+json",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                },
+                timeout=30,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the async HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking PyGithub call in a worker thread."""
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request with the pooled token that has the most budget left.
+        
+        Rate-limited (403/429) and 5xx responses are retried up to REQUEST_ATTEMPTS times,
+        honoring Retry-After and otherwise backing off exponentially with jitter.
+        """
+        if path == "/graphql":
+            resource = "graphql"
+        elif path.startswith("/search/"):
+            resource = "search"
+        else:
+            resource = "core"
+        headers = kwargs.pop("headers", None) or {}
+        
+        for attempt in range(REQUEST_ATTEMPTS):
+            token = await self._tokens.pick(resource)
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            resp = await self._http_client().request(method, path, headers=headers, **kwargs)
+            self._tokens.update(token, resp.headers, resource)
+            
+            status = resp.status_code
+            exhausted = status in (403, 429) and resp.headers.get("x-ratelimit-remaining") == "0"
+            retry_after = resp.headers.get("retry-after")
+            if attempt == REQUEST_ATTEMPTS - 1 or not (
+                exhausted or status == 429 or status >= 500 or (status == 403 and retry_after)
+            ):
+                return resp
+            
+            if retry_after:
+                delay = float(retry_after)
+            elif exhausted:
+                # The pool now knows this token is spent; pick() moves on or waits for the reset
+                delay = 0
+            else:
+                delay = min(60, 2 ** attempt) + random.random()
+            logger.warning("GitHub %s %s returned %s, retrying in %.1fs", method, path, status, delay)
+            await asyncio.sleep(min(delay, 60))
+        return resp
+    
+    async def _get_json(self, path: str, params: Optional[dict] = None) -> Any:
+        """GET a REST API path and return the decoded JSON body."""
+        resp = await self._request("GET", path, params=params)
+        resp.raise_for_status()
+        return loads(resp.content)
+    
+    async def _get_conditional(
+        self,
+        path: str,
+        parse: Callable[[httpx.Response], Any],
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> Any:
+        """GET path with If-None-Match; a 304 reuses the last parsed result.
+        
+        304 responses do not count against the rate limit and carry no body to download or decode.
+        """
+        key = make_key(path, {"params": params or {}, "headers": headers or {}})
+        entry = self._etags.get(key)
+        headers = dict(headers or {})
+        if entry is not MISS:
+            headers["If-None-Match"] = entry[0]
+        
+        resp = await self._request("GET", path, params=params, headers=headers)
+        if resp.status_code == 304 and entry is not MISS:
+            return entry[1]
+        resp.raise_for_status()
+        
+        value = parse(resp)
+        etag = resp.headers.get("etag")
+        if etag:
+            self._etags.set(key, (etag, value), ETAG_TTL, size=len(resp.content))
+        return value
+    
+    async def _graphql(self, query: str, variables: Optional[dict] = None, partial: bool = False) -> dict:
+        """Run a GraphQL query and return its data, raising on HTTP or GraphQL errors.
+        
+        With partial=True, GraphQL errors only raise when no data came back.
+        """
+        resp = await self._request(
+            "POST",
+            "/graphql",
+            content=dumps_bytes({"query": query, "variables": variables or {}}),
+            headers={"Content-Type": "application/json"},
+        )
+        resp.raise_for_status()
+        payload = loads(resp.content)
+        if payload.get("errors") and not (partial and payload.get("data")):
+            raise RuntimeError("; ".join(e.get("message", "") for e in payload["errors"]))
+        return payload["data"]
+    
+    def get_tools(self) -> dict[str, dict]:
+        """Return all GitHub tools."""
+        return self._tools
+    
     async def list_repos(self, owner: Optional[str] = None, type: str = "all") -> dict:
-        """List repositories."""
+        """List repositories (first 50, one GraphQL query, REST fallback)."""
+        affiliations = REPO_AFFILIATIONS.get(type, REPO_AFFILIATIONS["all"])
+        try:
+            # Own login: list via the viewer, skipping the owner lookup
+            if owner and owner.lower() == (await self._get_viewer_login()).lower():
+                owner = None
+            if owner:
+                data = await self._graphql(
+                    OWNER_REPOS_QUERY, {"login": owner, "affiliations": affiliations}
+                )
+                if data["repositoryOwner"] is None:
+                    raise ValueError(f"User or organization not found: {owner}")
+                nodes = data["repositoryOwner"]["repositories"]["nodes"]
+            else:
+                data = await self._graphql(VIEWER_REPOS_QUERY, {"affiliations": affiliations})
+                self._viewer_login = data["viewer"]["login"]
+                nodes = data["viewer"]["repositories"]["nodes"]
+        except (httpx.HTTPError, RuntimeError):
+            return await self._run(self._list_repos_rest, owner, type)
+        
+        result = [
+            {
+                "name": repo["name"],
+                "full_name": repo["nameWithOwner"],
+                "private": repo["isPrivate"],
+                "default_branch": (repo["defaultBranchRef"] or {}).get("name"),
+                "updated_at": repo["updatedAt"],
+            }
+            for repo in nodes
+        ]
+        
+        return {"repos": result, "count": len(result)}
+    
+    def _list_repos_rest(self, owner: Optional[str], type: str) -> dict:
+        # Blocking PyGithub path; run via self._run
         client = self._get_client()
         
         if owner:
@@ -203,13 +705,56 @@ class GitHubTools:
                 "full_name": repo.full_name,
                 "private": repo.private,
                 "default_branch": repo.default_branch,
-                "updated_at": repo.updated_at.isoformat() if repo.updated_at else None,
+                "updated_at": _iso(repo.updated_at),
             })
         
         return {"repos": result, "count": len(result)}
     
+    async def _get_viewer_login(self) -> str:
+        """Login of the authenticated user (fetched once)."""
+        if self._viewer_login is None:
+            data = await self._graphql("query { viewer { login } }")
+            self._viewer_login = data["viewer"]["login"]
+        return self._viewer_login
+    
+    @cached(ttl=600)
     async def get_repo_info(self, owner: str, repo: str) -> dict:
-        """Get repository information."""
+        """Get repository information (one GraphQL query, REST fallback)."""
+        try:
+            data = await self._graphql(REPO_INFO_QUERY, {"owner": owner, "name": repo})
+        except (httpx.HTTPError, RuntimeError):
+            # e.g. token scopes that GraphQL rejects; PyGithub raises the REST error if any
+            return await self._run(self._get_repo_info_rest, owner, repo)
+        
+        return _repo_details(data["repository"])
+    
+    @cached(ttl=600)
+    async def get_repo_info_batch(self, repos: List[str]) -> dict:
+        """Get information about several repositories with one aliased GraphQL query."""
+        params, fields, variables = [], [], {}
+        for i, full_name in enumerate(repos):
+            owner, sep, name = full_name.partition("/")
+            if not sep:
+                raise ValueError(f"Expected owner/repo, got {full_name!r}")
+            params.append(f"$o{i}: String!, $n{i}: String!")
+            fields.append(f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepoDetails }}")
+            variables[f"o{i}"] = owner
+            variables[f"n{i}"] = name
+        if not fields:
+            return {"repos": [], "count": 0}
+        
+        query = f"query({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}\n" + REPO_DETAILS_FRAGMENT
+        # Missing or inaccessible repos come back as null aliases alongside errors
+        data = await self._graphql(query, variables, partial=True)
+        
+        result = []
+        for i, full_name in enumerate(repos):
+            node = data.get(f"r{i}")
+            result.append(_repo_details(node) if node else {"full_name": full_name, "error": "not found"})
+        return {"repos": result, "count": len(result)}
+    
+    def _get_repo_info_rest(self, owner: str, repo: str) -> dict:
+        # Blocking PyGithub path; run via self._run
         client = self._get_client()
         r = client.get_repo(f"{owner}/{repo}")
         
@@ -223,30 +768,36 @@ class GitHubTools:
             "stars": r.stargazers_count,
             "forks": r.forks_count,
             "open_issues": r.open_issues_count,
-            "created_at": r.created_at.isoformat() if r.created_at else None,
-            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+            "created_at": _iso(r.created_at),
+            "updated_at": _iso(r.updated_at),
             "clone_url": r.clone_url,
         }
     
+    @cached(ttl=60)
     async def list_prs(self, owner: str, repo: str, state: str = "open", limit: int = 20) -> dict:
-        """List pull requests."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        prs = r.get_pulls(state=state)
+        """List pull requests (one GraphQL query, newest first, at most 100)."""
+        data = await self._graphql(PR_LIST_QUERY, {
+            "owner": owner,
+            "name": repo,
+            "first": max(1, min(limit, 100)),
+            "states": PR_STATES.get(state, PR_STATES["open"]),
+        })
+        if data["repository"] is None:
+            raise ValueError(f"Repository not found: {owner}/{repo}")
         
         result = []
-        for pr in prs[:limit]:
+        for pr in data["repository"]["pullRequests"]["nodes"]:
             result.append({
-                "number": pr.number,
-                "title": pr.title,
-                "state": pr.state,
-                "user": pr.user.login,
-                "created_at": pr.created_at.isoformat() if pr.created_at else None,
-                "updated_at": pr.updated_at.isoformat() if pr.updated_at else None,
-                "head": pr.head.ref,
-                "base": pr.base.ref,
-                "draft": pr.draft,
-                "mergeable": pr.mergeable,
+                "number": pr["number"],
+                "title": pr["title"],
+                "state": "open" if pr["state"] == "OPEN" else "closed",
+                "user": (pr["author"] or {}).get("login"),
+                "created_at": pr["createdAt"],
+                "updated_at": pr["updatedAt"],
+                "head": pr["headRefName"],
+                "base": pr["baseRefName"],
+                "draft": pr["isDraft"],
+                "mergeable": MERGEABLE.get(pr["mergeable"]),
             })
         
         return {"pull_requests": result, "count": len(result)}
@@ -262,17 +813,22 @@ class GitHubTools:
         draft: bool = False,
     ) -> dict:
         """Create a pull request."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        
-        pr = r.create_pull(title=title, body=body, head=head, base=base, draft=draft)
+        def call():
+            client = self._get_client()
+            r = client.get_repo(f"{owner}/{repo}")
+            
+            pr = r.create_pull(title=title, body=body, head=head, base=base, draft=draft)
+            
+            return {
+                "number": pr.number,
+                "title": pr.title,
+                "url": pr.html_url,
+                "status": "created",
+            }
         
-        return {
-            "number": pr.number,
-            "title": pr.title,
-            "url": pr.html_url,
-            "status": "created",
-        }
+        result = await self._run(call)
+        self._cache.clear()
+        return result
     
     async def merge_pr(
         self,
@@ -282,18 +838,24 @@ class GitHubTools:
         merge_method: str = "squash",
     ) -> dict:
         """Merge a pull request."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        pr = r.get_pull(pr_number)
+        def call():
+            client = self._get_client()
+            r = client.get_repo(f"{owner}/{repo}")
+            pr = r.get_pull(pr_number)
+            
+            result = pr.merge(merge_method=merge_method)
+            
+            return {
+                "merged": result.merged,
+                "message": result.message,
+                "sha": result.sha,
+            }
         
-        result = pr.merge(merge_method=merge_method)
-        
-        return {
-            "merged": result.merged,
-            "message": result.message,
-            "sha": result.sha,
-        }
+        result = await self._run(call)
+        self._cache.clear()
+        return result
     
+    @cached(ttl=60)
     async def list_issues(
         self,
         owner: str,
@@ -302,29 +864,37 @@ class GitHubTools:
         labels: Optional[List[str]] = None,
         limit: int = 20,
     ) -> dict:
-        """List issues."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        
-        kwargs = {"state": state}
+        """List issues, newest first (pull requests, which the issues API also returns, are skipped)."""
+        params = {
+            "state": state,
+            "sort": "created",
+            "direction": "desc",
+            "per_page": 100,
+            "page": 1,
+        }
         if labels:
-            kwargs["labels"] = labels
-        
-        issues = r.get_issues(**kwargs)
+            params["labels"] = ",".join(labels)
         
         result = []
-        for issue in issues[:limit]:
-            # Skip pull requests (they show up as issues)
-            if issue.pull_request:
-                continue
-            result.append({
-                "number": issue.number,
-                "title": issue.title,
-                "state": issue.state,
-                "user": issue.user.login,
-                "labels": [l.name for l in issue.labels],
-                "created_at": issue.created_at.isoformat() if issue.created_at else None,
-            })
+        while len(result) < limit:
+            resp = await self._request("GET", f"/repos/{owner}/{repo}/issues", params=params)
+            resp.raise_for_status()
+            for issue in loads(resp.content):
+                if "pull_request" in issue:
+                    continue
+                result.append({
+                    "number": issue["number"],
+                    "title": issue["title"],
+                    "state": issue["state"],
+                    "user": (issue.get("user") or {}).get("login"),
+                    "labels": [l["name"] for l in issue.get("labels", [])],
+                    "created_at": issue.get("created_at"),
+                })
+                if len(result) >= limit:
+                    break
+            if "next" not in resp.links:
+                break
+            params["page"] += 1
         
         return {"issues": result, "count": len(result)}
     
@@ -338,24 +908,30 @@ class GitHubTools:
         assignees: Optional[List[str]] = None,
     ) -> dict:
         """Create an issue."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        
-        kwargs = {"title": title, "body": body}
-        if labels:
-            kwargs["labels"] = labels
-        if assignees:
-            kwargs["assignees"] = assignees
-        
-        issue = r.create_issue(**kwargs)
+        def call():
+            client = self._get_client()
+            r = client.get_repo(f"{owner}/{repo}")
+            
+            kwargs = {"title": title, "body": body}
+            if labels:
+                kwargs["labels"] = labels
+            if assignees:
+                kwargs["assignees"] = assignees
+            
+            issue = r.create_issue(**kwargs)
+            
+            return {
+                "number": issue.number,
+                "title": issue.title,
+                "url": issue.html_url,
+                "status": "created",
+            }
         
-        return {
-            "number": issue.number,
-            "title": issue.title,
-            "url": issue.html_url,
-            "status": "created",
-        }
+        result = await self._run(call)
+        self._cache.clear()
+        return result
     
+    @cached(ttl=60)
     async def list_workflow_runs(
         self,
         owner: str,
@@ -365,25 +941,27 @@ class GitHubTools:
         limit: int = 10,
     ) -> dict:
         """List workflow runs."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        
+        # The runs endpoint takes the workflow file name directly, so no separate lookup
         if workflow:
-            wf = r.get_workflow(workflow)
-            runs = wf.get_runs(status=status) if status else wf.get_runs()
+            path = f"/repos/{owner}/{repo}/actions/workflows/{workflow}/runs"
         else:
-            runs = r.get_workflow_runs(status=status) if status else r.get_workflow_runs()
+            path = f"/repos/{owner}/{repo}/actions/runs"
+        params = {"per_page": max(1, min(limit, 100))}
+        if status:
+            params["status"] = status
+        
+        data = await self._get_json(path, params)
         
         result = []
-        for run in runs[:limit]:
+        for run in data.get("workflow_runs", [])[:limit]:
             result.append({
-                "id": run.id,
-                "name": run.name,
-                "status": run.status,
-                "conclusion": run.conclusion,
-                "branch": run.head_branch,
-                "created_at": run.created_at.isoformat() if run.created_at else None,
-                "url": run.html_url,
+                "id": run["id"],
+                "name": run.get("name"),
+                "status": run.get("status"),
+                "conclusion": run.get("conclusion"),
+                "branch": run.get("head_branch"),
+                "created_at": run.get("created_at"),
+                "url": run.get("html_url"),
             })
         
         return {"runs": result, "count": len(result)}
@@ -397,33 +975,57 @@ class GitHubTools:
         inputs: Optional[dict] = None,
     ) -> dict:
         """Trigger a workflow dispatch."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        wf = r.get_workflow(workflow)
-        
-        result = wf.create_dispatch(ref=ref, inputs=inputs or {})
+        def call():
+            client = self._get_client()
+            r = client.get_repo(f"{owner}/{repo}")
+            wf = r.get_workflow(workflow)
+            
+            result = wf.create_dispatch(ref=ref, inputs=inputs or {})
+            
+            return {
+                "status": "triggered",
+                "workflow": workflow,
+                "ref": ref,
+            }
         
-        return {
-            "status": "triggered",
-            "workflow": workflow,
-            "ref": ref,
-        }
+        result = await self._run(call)
+        self._cache.clear()
+        return result
     
-    async def list_branches(self, owner: str, repo: str) -> dict:
-        """List branches."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
+    @cached(ttl=600)
+    async def list_branches(
+        self,
+        owner: str,
+        repo: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """List one page of branches; next_cursor is set when more exist."""
+        # Cursors are the page numbers handed out as next_cursor
+        if cursor is not None and not re.fullmatch(r"[1-9][0-9]*", str(cursor)):
+            return {"error": "invalid cursor"}
+        page = int(cursor or 1)
+        resp = await self._request(
+            "GET",
+            f"/repos/{owner}/{repo}/branches",
+            params={"per_page": max(1, min(limit, 100)), "page": page},
+        )
+        resp.raise_for_status()
         
         result = []
-        for branch in r.get_branches():
+        for branch in loads(resp.content):
             result.append({
-                "name": branch.name,
-                "protected": branch.protected,
-                "sha": branch.commit.sha[:7],
+                "name": branch["name"],
+                "protected": branch["protected"],
+                "sha": branch["commit"]["sha"][:7],
             })
         
-        return {"branches": result, "count": len(result)}
+        response = {"branches": result, "count": len(result)}
+        if "next" in resp.links:
+            response["next_cursor"] = str(page + 1)
+        return response
     
+    @cached(ttl=300, when=lambda args: bool(_SHA_RE.fullmatch(args["ref"])))
     async def get_file_content(
         self,
         owner: str,
@@ -431,16 +1033,22 @@ class GitHubTools:
         path: str,
         ref: str = "main",
     ) -> dict:
-        """Get file content."""
-        client = self._get_client()
-        r = client.get_repo(f"{owner}/{repo}")
-        
-        content = r.get_contents(path, ref=ref)
+        """Get file content (raw media type: no base64, no 1 MB Contents API cap)."""
+        def parse(resp: httpx.Response) -> dict:
+            data = resp.content
+            return {
+                "path": path,
+                "name": posixpath.basename(path),
+                "size": len(data),
+                "content": data.decode("utf-8"),
+                # Git blob SHA, identical to the "sha" the Contents API reports
+                "sha": hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest(),
+            }
         
-        return {
-            "path": content.path,
-            "name": content.name,
-            "size": content.size,
-            "content": content.decoded_content.decode("utf-8"),
-            "sha": content.sha,
-        }
+        # Branch refs are not cached, but an unchanged file revalidates with a free 304
+        return await self._get_conditional(
+            f"/repos/{owner}/{repo}/contents/{quote(path, safe='/')}",
+            parse,
+            params={"ref": ref},
+            headers={"Accept": "application/vnd.github.raw"},
+        )
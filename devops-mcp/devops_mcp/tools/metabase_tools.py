@@ -6,10 +6,80 @@ Tools for interacting with self-hosted Metabase - dashboards, questions, and emb
 
 import os
 import json
+import time
+import hmac
+import base64
+import hashlib
+import asyncio
+import tempfile
+import importlib.util
 import httpx
 from typing import Any, Optional, List
 from datetime import datetime
 
+from ..cache import TTLCache, cached
+from ..serialization import dumps_bytes, loads
+
+# Multiplex concurrent requests over one connection when h2 is installed (devops-mcp[perf])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Client-wide timeouts; question and ad-hoc query runs get QUERY_TIMEOUT per request
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0)
+QUERY_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Metabase sessions last 14 days by default; log in again a day before that
+SESSION_TTL = 13 * 24 * 3600
+
+# Max card queries in flight per metabase_dashboard_run call
+DASHBOARD_CONCURRENCY = int(os.environ.get("METABASE_DASHBOARD_CONCURRENCY", "8"))
+
+# Rows returned per question/query result
+MAX_ROWS = 100
+
+# Streaming chunk size for dataset exports
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Fields kept per row by the list handlers, see _project
+DASHBOARD_FIELDS = ("id", "name", "description", "collection_id")
+QUESTION_FIELDS = ("id", "name", "description", "display", "collection_id")
+COLLECTION_FIELDS = ("id", "name", "location")
+DATABASE_FIELDS = ("id", "name", "engine")
+TABLE_FIELD_FIELDS = ("id", "name", "display_name", "base_type", "semantic_type")
+
+
+def _b64url(data: bytes) -> bytes:
+    """Unpadded base64url, as used in JWT segments."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+_JWT_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _project(rows: list, fields: tuple) -> list:
+    """Keep only the given fields of each row (missing ones become None)."""
+    return [dict(zip(fields, map(row.get, fields))) for row in rows]
+
+
+def _query_result(data: dict) -> dict:
+    """Columns and the first MAX_ROWS rows of a query response."""
+    result_data = data.get("data", {})
+    rows = result_data.get("rows", [])
+    
+    return {
+        "columns": [c.get("display_name") or c.get("name") for c in result_data.get("cols", [])],
+        "rows": rows[:MAX_ROWS],
+        "row_count": data.get("row_count", len(rows)),
+        "truncated": len(rows) > MAX_ROWS,
+    }
+
+
+def _unlink_missing_ok(path: str) -> None:
+    """Remove path if it exists."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
 
 class MetabaseTools:
     """Metabase analytics and embedding tools."""
@@ -19,28 +89,86 @@ class MetabaseTools:
         self.username = os.environ.get("METABASE_USERNAME")
         self.password = os.environ.get("METABASE_PASSWORD")
         self.secret_key = os.environ.get("METABASE_SECRET_KEY")  # For signed embeds
+        self._secret_bytes = (self.secret_key or "").encode()
         self._session_token = None
+        self._session_expiry = 0.0
+        self._session_headers: dict = {}
+        self._session_lock = asyncio.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
+        # Results of rarely changing listings, see @cached
+        self._cache = TTLCache(max_entries=256)
+        self._inflight: dict[str, asyncio.Future] = {}
     
     def is_configured(self) -> bool:
         return bool(self.base_url and (self.username or self.secret_key))
     
-    async def _get_session(self) -> str:
-        """Get or refresh session token."""
-        if self._session_token:
-            return self._session_token
+    async def _client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for the Metabase API (created on first use)."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300),
+                timeout=DEFAULT_TIMEOUT,
+                http2=HTTP2,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _get_session(self, stale: Optional[str] = None) -> str:
+        """Get or refresh session token; stale is a token the server just rejected."""
+        token = self._session_token
+        if token and token != stale and time.monotonic() < self._session_expiry:
+            return token
         
-        async with httpx.AsyncClient() as client:
+        # One login at a time; callers that queued behind it reuse the fresh token
+        async with self._session_lock:
+            token = self._session_token
+            if token and token != stale and time.monotonic() < self._session_expiry:
+                return token
+            
+            client = await self._client()
             resp = await client.post(
-                f"{self.base_url}/api/session",
+                "/api/session",
                 json={"username": self.username, "password": self.password}
             )
-            data = resp.json()
+            resp.raise_for_status()
+            data = loads(resp.content)
             self._session_token = data.get("id")
+            self._session_headers = {"X-Metabase-Session": self._session_token}
+            self._session_expiry = time.monotonic() + SESSION_TTL
         
         return self._session_token
     
-    def _headers(self, token: str) -> dict:
-        return {"X-Metabase-Session": token}
+    async def _request(self, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send an authenticated request, logging in again once if the session was rejected.
+        
+        With stream=True the body is not read; the caller must close the response.
+        """
+        client = await self._client()
+        token = await self._get_session()
+        resp = await client.send(
+            client.build_request(method, path, headers=self._session_headers, **kwargs), stream=stream
+        )
+        if resp.status_code == 401:
+            await resp.aclose()
+            await self._get_session(stale=token)
+            resp = await client.send(
+                client.build_request(method, path, headers=self._session_headers, **kwargs), stream=stream
+            )
+        if resp.is_error:
+            await resp.aread()
+            # Skips decoding HTML/text error pages as JSON and surfaces Metabase's message
+            raise httpx.HTTPStatusError(
+                f"Metabase API error {resp.status_code}: {resp.text[:500]}",
+                request=resp.request,
+                response=resp,
+            )
+        return resp
     
     def get_tools(self) -> dict[str, dict]:
         return {
@@ -65,6 +193,18 @@ class MetabaseTools:
                 },
                 "handler": self.get_dashboard,
             },
+            "metabase_dashboard_run": {
+                "description": "Get a dashboard and run all of its cards concurrently",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "dashboard_id": {"type": "integer", "description": "Dashboard ID"},
+                        "parameters": {"type": "object", "description": "Filter parameters applied to every card"},
+                    },
+                    "required": ["dashboard_id"],
+                },
+                "handler": self.get_dashboard_with_results,
+            },
             "metabase_question_list": {
                 "description": "List saved questions (cards)",
                 "input_schema": {
@@ -99,6 +239,20 @@ class MetabaseTools:
                 },
                 "handler": self.run_query,
             },
+            "metabase_dataset_export": {
+                "description": "Export an ad-hoc SQL query's full result to a CSV, JSON or XLSX file",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "database_id": {"type": "integer", "description": "Database ID"},
+                        "query": {"type": "string", "description": "SQL query"},
+                        "format": {"type": "string", "enum": ["csv", "json", "xlsx"], "default": "csv"},
+                        "destination_path": {"type": "string", "description": "File to write (default: a new temp file)"},
+                    },
+                    "required": ["database_id", "query"],
+                },
+                "handler": self.export_query,
+            },
             "metabase_embed_url": {
                 "description": "Generate a signed embed URL for a dashboard or question",
                 "input_schema": {
@@ -163,46 +317,24 @@ class MetabaseTools:
     
     async def list_dashboards(self, collection_id: Optional[int] = None) -> dict:
         """List dashboards."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            if collection_id:
-                resp = await client.get(
-                    f"{self.base_url}/api/collection/{collection_id}/items",
-                    headers=self._headers(token),
-                    params={"models": "dashboard"}
-                )
-            else:
-                resp = await client.get(
-                    f"{self.base_url}/api/dashboard",
-                    headers=self._headers(token),
-                )
-            data = resp.json()
-        
-        dashboards = data if isinstance(data, list) else data.get("data", [])
+        if collection_id:
+            resp = await self._request(
+                "GET",
+                f"/api/collection/{collection_id}/items",
+                params={"models": "dashboard"}
+            )
+            # Collection items come wrapped: {"data": [...], "total": ...}
+            dashboards = loads(resp.content).get("data", [])
+        else:
+            resp = await self._request("GET", "/api/dashboard")
+            dashboards = loads(resp.content)
         
-        return {
-            "dashboards": [
-                {
-                    "id": d.get("id"),
-                    "name": d.get("name"),
-                    "description": d.get("description"),
-                    "collection_id": d.get("collection_id"),
-                }
-                for d in dashboards
-            ]
-        }
+        return {"dashboards": _project(dashboards, DASHBOARD_FIELDS)}
     
     async def get_dashboard(self, dashboard_id: int) -> dict:
         """Get dashboard details."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/dashboard/{dashboard_id}",
-                headers=self._headers(token),
-            )
-            data = resp.json()
+        resp = await self._request("GET", f"/api/dashboard/{dashboard_id}")
+        data = loads(resp.content)
         
         return {
             "id": data.get("id"),
@@ -220,91 +352,130 @@ class MetabaseTools:
             ],
         }
     
+    async def get_dashboard_with_results(self, dashboard_id: int, parameters: Optional[dict] = None) -> dict:
+        """Get a dashboard with each card's query results."""
+        dashboard = await self.get_dashboard(dashboard_id)
+        sem = asyncio.Semaphore(DASHBOARD_CONCURRENCY)
+        
+        async def _one(card: dict) -> None:
+            try:
+                async with sem:
+                    card["result"] = await self.run_question(card["card_id"], parameters)
+            except Exception as e:
+                card["error"] = str(e)
+        
+        # Text and heading cards have no card_id and nothing to run
+        await asyncio.gather(*(_one(c) for c in dashboard["cards"] if c.get("card_id")))
+        return dashboard
+    
     async def list_questions(self, collection_id: Optional[int] = None) -> dict:
         """List saved questions."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            if collection_id:
-                resp = await client.get(
-                    f"{self.base_url}/api/collection/{collection_id}/items",
-                    headers=self._headers(token),
-                    params={"models": "card"}
-                )
-                data = resp.json()
-                questions = data.get("data", [])
-            else:
-                resp = await client.get(
-                    f"{self.base_url}/api/card",
-                    headers=self._headers(token),
-                )
-                questions = resp.json()
+        if collection_id:
+            resp = await self._request(
+                "GET",
+                f"/api/collection/{collection_id}/items",
+                params={"models": "card"}
+            )
+            # Collection items come wrapped: {"data": [...], "total": ...}
+            questions = loads(resp.content).get("data", [])
+        else:
+            resp = await self._request("GET", "/api/card")
+            questions = loads(resp.content)
         
-        return {
-            "questions": [
-                {
-                    "id": q.get("id"),
-                    "name": q.get("name"),
-                    "description": q.get("description"),
-                    "display": q.get("display"),
-                    "collection_id": q.get("collection_id"),
-                }
-                for q in questions
-            ]
-        }
+        return {"questions": _project(questions, QUESTION_FIELDS)}
     
     async def run_question(self, question_id: int, parameters: Optional[dict] = None) -> dict:
         """Execute a saved question."""
-        token = await self._get_session()
-        
         body = {}
         if parameters:
             body["parameters"] = [
                 {"type": k, "value": v} for k, v in parameters.items()
             ]
         
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                f"{self.base_url}/api/card/{question_id}/query",
-                headers=self._headers(token),
-                json=body,
-            )
-            data = resp.json()
-        
-        result_data = data.get("data", {})
-        
-        return {
-            "columns": [c.get("display_name") or c.get("name") for c in result_data.get("cols", [])],
-            "rows": result_data.get("rows", [])[:100],  # Limit rows
-            "row_count": len(result_data.get("rows", [])),
-            "truncated": len(result_data.get("rows", [])) > 100,
-        }
+        resp = await self._request(
+            "POST",
+            f"/api/card/{question_id}/query",
+            json=body,
+            timeout=QUERY_TIMEOUT,
+        )
+        return _query_result(loads(resp.content))
     
     async def run_query(self, database_id: int, query: str) -> dict:
         """Run ad-hoc SQL query."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                f"{self.base_url}/api/dataset",
-                headers=self._headers(token),
-                json={
-                    "database": database_id,
-                    "native": {"query": query},
-                    "type": "native",
-                },
-            )
-            data = resp.json()
-        
-        result_data = data.get("data", {})
+        resp = await self._request(
+            "POST",
+            "/api/dataset",
+            json={
+                "database": database_id,
+                "native": {"query": query},
+                "type": "native",
+                # Let Metabase stop after one row past the cap instead of shipping the full result
+                "constraints": {"max-results": MAX_ROWS + 1, "max-results-bare-rows": MAX_ROWS + 1},
+            },
+            timeout=QUERY_TIMEOUT,
+        )
+        result = _query_result(loads(resp.content))
+        if result["truncated"]:
+            # Metabase stopped at the cap, so the full row count is unknown
+            del result["row_count"]
+        return result
+    
+    async def export_query(
+        self,
+        database_id: int,
+        query: str,
+        format: str = "csv",
+        destination_path: Optional[str] = None,
+    ) -> dict:
+        """Stream a query export to disk; rows are never parsed or held in memory."""
+        resp = await self._request(
+            "POST",
+            f"/api/dataset/{format}",
+            stream=True,
+            # The export endpoints take the query as a form field holding JSON
+            data={"query": dumps_bytes({
+                "database": database_id,
+                "native": {"query": query},
+                "type": "native",
+            }).decode()},
+            timeout=QUERY_TIMEOUT,
+        )
+        size = 0
+        try:
+            if destination_path:
+                # Written beside the destination and moved into place once complete
+                part_path = f"{destination_path}.{os.getpid()}.part"
+                f = await asyncio.to_thread(open, part_path, "wb")
+            else:
+                fd, part_path = tempfile.mkstemp(prefix="metabase-export-", suffix=f".{format}")
+                f = os.fdopen(fd, "wb")
+            try:
+                try:
+                    # Disk writes run in a worker thread to keep the loop free
+                    async for chunk in resp.aiter_bytes(EXPORT_CHUNK_SIZE):
+                        size += len(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+                if destination_path:
+                    await asyncio.to_thread(os.replace, part_path, destination_path)
+                else:
+                    destination_path = part_path
+            except BaseException:
+                # Never leave an empty or partial export behind
+                await asyncio.to_thread(_unlink_missing_ok, part_path)
+                raise
+        finally:
+            await resp.aclose()
         
         return {
-            "columns": [c.get("display_name") or c.get("name") for c in result_data.get("cols", [])],
-            "rows": result_data.get("rows", [])[:100],
-            "row_count": len(result_data.get("rows", [])),
+            "status": "success",
+            "output_path": destination_path,
+            "format": format,
+            "size": size,
         }
     
-    async def generate_embed_url(
+    def generate_embed_url(
         self,
         resource_type: str,
         resource_id: int,
@@ -312,9 +483,6 @@ class MetabaseTools:
         expiry_minutes: int = 60,
     ) -> dict:
         """Generate signed embed URL."""
-        import jwt
-        import time
-        
         if not self.secret_key:
             return {"error": "METABASE_SECRET_KEY not configured"}
         
@@ -324,7 +492,10 @@ class MetabaseTools:
             "exp": int(time.time()) + (expiry_minutes * 60),
         }
         
-        token = jwt.encode(payload, self.secret_key, algorithm="HS256")
+        # HS256 JWT signed directly with hmac; the header segment is constant
+        signing_input = _JWT_HEADER + b"." + _b64url(dumps_bytes(payload))
+        signature = hmac.new(self._secret_bytes, signing_input, hashlib.sha256).digest()
+        token = (signing_input + b"." + _b64url(signature)).decode()
         
         embed_url = f"{self.base_url}/embed/{resource_type}/{token}"
         
@@ -335,113 +506,62 @@ class MetabaseTools:
             "resource_id": resource_id,
         }
     
+    @cached(ttl=300)
     async def list_collections(self) -> dict:
         """List collections."""
-        token = await self._get_session()
+        resp = await self._request("GET", "/api/collection")
+        data = loads(resp.content)
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/collection",
-                headers=self._headers(token),
-            )
-            data = resp.json()
-        
-        return {
-            "collections": [
-                {
-                    "id": c.get("id"),
-                    "name": c.get("name"),
-                    "location": c.get("location"),
-                }
-                for c in data
-            ]
-        }
+        return {"collections": _project(data, COLLECTION_FIELDS)}
     
+    @cached(ttl=300)
     async def list_databases(self) -> dict:
         """List connected databases."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/database",
-                headers=self._headers(token),
-            )
-            data = resp.json()
-        
-        db_list = data if isinstance(data, list) else data.get("data", [])
-        return {
-            "databases": [
-                {
-                    "id": d.get("id"),
-                    "name": d.get("name"),
-                    "engine": d.get("engine"),
-                    "tables": d.get("tables", []),
-                }
-                for d in db_list
-            ]
-        }
+        resp = await self._request("GET", "/api/database")
+        # Current Metabase versions wrap the list: {"data": [...], "total": ...}
+        db_list = loads(resp.content).get("data", [])
+        databases = _project(db_list, DATABASE_FIELDS)
+        for row, d in zip(databases, db_list):
+            row["tables"] = d.get("tables", [])
+        return {"databases": databases}
     
+    @cached(ttl=300)
     async def get_table_metadata(self, table_id: int) -> dict:
         """Get table schema."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/table/{table_id}/query_metadata",
-                headers=self._headers(token),
-            )
-            data = resp.json()
+        resp = await self._request("GET", f"/api/table/{table_id}/query_metadata")
+        data = loads(resp.content)
         
         return {
             "id": data.get("id"),
             "name": data.get("name"),
             "schema": data.get("schema"),
-            "fields": [
-                {
-                    "id": f.get("id"),
-                    "name": f.get("name"),
-                    "display_name": f.get("display_name"),
-                    "base_type": f.get("base_type"),
-                    "semantic_type": f.get("semantic_type"),
-                }
-                for f in data.get("fields", [])
-            ],
+            "fields": _project(data.get("fields", []), TABLE_FIELD_FIELDS),
         }
     
     async def list_pulses(self) -> dict:
         """List scheduled reports."""
-        token = await self._get_session()
+        resp = await self._request("GET", "/api/pulse")
+        data = loads(resp.content)
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/pulse",
-                headers=self._headers(token),
-            )
-            data = resp.json()
+        pulses = []
+        for p in data:
+            get = p.get
+            pulses.append({
+                "id": get("id"),
+                "name": get("name"),
+                # Tuple defaults: no empty list allocated when a key is absent
+                "cards": [c.get("name") for c in get("cards", ())],
+                "channels": [c.get("channel_type") for c in get("channels", ())],
+            })
         
-        return {
-            "pulses": [
-                {
-                    "id": p.get("id"),
-                    "name": p.get("name"),
-                    "cards": [c.get("name") for c in p.get("cards", [])],
-                    "channels": [c.get("channel_type") for c in p.get("channels", [])],
-                }
-                for p in data
-            ]
-        }
+        return {"pulses": pulses}
     
     async def trigger_pulse(self, pulse_id: int) -> dict:
         """Manually send a pulse."""
-        token = await self._get_session()
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{self.base_url}/api/pulse/{pulse_id}/test",
-                headers=self._headers(token),
-            )
+        # Error responses raise from _request, so reaching here means Metabase accepted it
+        await self._request("POST", f"/api/pulse/{pulse_id}/test")
         
         return {
-            "status": "triggered" if resp.status_code == 200 else "failed",
+            "status": "triggered",
             "pulse_id": pulse_id,
         }
@@ -5,8 +5,31 @@ Tools for managing n8n workflows and executions.
 """
 
 import os
+import asyncio
+import importlib.util
 import httpx
-from typing import Any, Optional
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from ..cache import TTLCache, cached
+from ..serialization import loads
+
+# Multiplex concurrent requests over one connection when h2 is installed (devops-mcp[perf])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Client-wide timeouts; webhooks run a workflow before answering, so they get WEBHOOK_TIMEOUT
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0)
+WEBHOOK_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Largest page the n8n public API returns
+MAX_PAGE_SIZE = 250
+
+# Execution summary fields and the n8n keys they are read from
+EXECUTION_FIELDS = ("id", "workflow_id", "status", "started_at", "finished_at")
+EXECUTION_KEYS = ("id", "workflowId", "status", "startedAt", "stoppedAt")
+
+# How long a workflow listing is reused for repeated (e.g. polling) calls, in seconds
+WORKFLOW_LIST_TTL = 10
 
 
 class N8nTools:
@@ -15,12 +38,70 @@ class N8nTools:
     def __init__(self):
         self.base_url = os.environ.get("N8N_URL", "").rstrip("/")
         self.api_key = os.environ.get("N8N_API_KEY")
+        # Sent on API calls only; webhooks are public endpoints and must not see the key
+        self._api_headers = {"X-N8N-API-KEY": self.api_key}
+        self._http: Optional[httpx.AsyncClient] = None
+        # Workflow listings, see @cached; cleared when a workflow is (de)activated
+        self._cache = TTLCache(max_entries=64)
+        self._inflight: dict[str, asyncio.Future] = {}
     
     def is_configured(self) -> bool:
         return bool(self.base_url and self.api_key)
     
-    def _headers(self):
-        return {"X-N8N-API-KEY": self.api_key}
+    async def _client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for the n8n API and webhooks (created on first use)."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300),
+                timeout=DEFAULT_TIMEOUT,
+                http2=HTTP2,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send an API request with the key header; error responses raise with the start of their body."""
+        client = await self._client()
+        resp = await client.request(method, path, headers=self._api_headers, **kwargs)
+        if resp.is_error:
+            # Skips decoding HTML/text error pages as JSON and surfaces n8n's message
+            raise httpx.HTTPStatusError(
+                f"n8n API error {resp.status_code}: {resp.text[:500]}",
+                request=resp.request,
+                response=resp,
+            )
+        return resp
+    
+    async def _pages(self, path: str, params: dict, limit: Optional[int] = None) -> AsyncIterator[list]:
+        """Yield the pages of a cursor-paginated list endpoint.
+        
+        The next page is requested while the caller consumes the current one, until
+        limit items have been yielded (or the last page when limit is None).
+        """
+        async def fetch(cursor: Optional[str]) -> dict:
+            resp = await self._request("GET", path, params={**params, "cursor": cursor} if cursor else params)
+            return loads(resp.content)
+        
+        pending = asyncio.ensure_future(fetch(None))
+        seen = 0
+        try:
+            while pending is not None:
+                data = await pending
+                page = data.get("data", [])
+                seen += len(page)
+                cursor = data.get("nextCursor")
+                more = cursor and (limit is None or seen < limit)
+                pending = asyncio.ensure_future(fetch(cursor)) if more else None
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
     
     def get_tools(self) -> dict[str, dict]:
         return {
@@ -126,41 +207,41 @@ class N8nTools:
             },
         }
     
-    async def list_workflows(self, active: Optional[bool] = None, tags: Optional[list] = None) -> dict:
+    async def list_workflows(self, active: Optional[bool] = None, tags: Optional[Sequence[str]] = None) -> dict:
+        # Normalize so the same filter in any order shares one cache entry
+        return await self._list_workflows(active, tuple(sorted(tags)) if tags else ())
+    
+    @cached(ttl=WORKFLOW_LIST_TTL)
+    async def _list_workflows(self, active: Optional[bool], tags: tuple) -> dict:
         params = {}
         if active is not None:
             params["active"] = active
         if tags:
             params["tags"] = ",".join(tags)
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/workflows",
-                headers=self._headers(),
-                params=params,
-            )
-            data = resp.json()
+        params["limit"] = MAX_PAGE_SIZE
+        # Pinned test data can dwarf the workflow itself and is not part of the summary
+        params["excludePinnedData"] = True
         
-        return {
-            "workflows": [
-                {
-                    "id": w["id"],
-                    "name": w["name"],
-                    "active": w["active"],
-                    "tags": [t["name"] for t in w.get("tags", [])],
-                    "updated_at": w.get("updatedAt"),
-                }
-                for w in data.get("data", [])
-            ]
-        }
+        workflows = []
+        async with aclosing(self._pages("/api/v1/workflows", params)) as pages:
+            async for page in pages:
+                workflows.extend(
+                    {
+                        "id": w["id"],
+                        "name": w["name"],
+                        "active": w["active"],
+                        "tags": [t["name"] for t in w.get("tags", [])],
+                        "updated_at": w.get("updatedAt"),
+                    }
+                    for w in page
+                )
+        
+        return {"workflows": workflows}
     
     async def get_workflow(self, workflow_id: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/workflows/{workflow_id}",
-                headers=self._headers(),
-            )
-            data = resp.json()
+        resp = await self._request("GET", f"/api/v1/workflows/{workflow_id}")
+        data = loads(resp.content)
         
         return {
             "id": data["id"],
@@ -171,20 +252,14 @@ class N8nTools:
         }
     
     async def activate_workflow(self, workflow_id: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.patch(
-                f"{self.base_url}/api/v1/workflows/{workflow_id}/activate",
-                headers=self._headers(),
-            )
+        resp = await self._request("PATCH", f"/api/v1/workflows/{workflow_id}/activate")
+        self._cache.clear()
         
         return {"workflow_id": workflow_id, "status": "activated"}
     
     async def deactivate_workflow(self, workflow_id: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.patch(
-                f"{self.base_url}/api/v1/workflows/{workflow_id}/deactivate",
-                headers=self._headers(),
-            )
+        resp = await self._request("PATCH", f"/api/v1/workflows/{workflow_id}/deactivate")
+        self._cache.clear()
         
         return {"workflow_id": workflow_id, "status": "deactivated"}
     
@@ -193,59 +268,52 @@ class N8nTools:
         if data:
             body["data"] = data
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{self.base_url}/api/v1/workflows/{workflow_id}/run",
-                headers=self._headers(),
-                json=body,
-            )
-            result = resp.json()
+        resp = await self._request("POST", f"/api/v1/workflows/{workflow_id}/run", json=body)
+        result = loads(resp.content)
         
         return {
             "execution_id": result.get("data", {}).get("executionId"),
             "status": "started",
         }
     
-    async def list_executions(
+    async def iter_executions(
         self,
         workflow_id: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 20,
-    ) -> dict:
-        params = {"limit": limit}
+        page_size: int = MAX_PAGE_SIZE,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """Yield executions page by page, newest first."""
+        # Leave out each execution's run data; get_execution fetches it for one run
+        params = {"limit": min(page_size, MAX_PAGE_SIZE), "includeData": False}
         if workflow_id:
             params["workflowId"] = workflow_id
         if status:
             params["status"] = status
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/executions",
-                headers=self._headers(),
-                params=params,
-            )
-            data = resp.json()
+        async with aclosing(self._pages("/api/v1/executions", params, limit)) as pages:
+            async for page in pages:
+                for e in page:
+                    yield e
+    
+    async def list_executions(
+        self,
+        workflow_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 20,
+    ) -> dict:
+        executions = []
+        async with aclosing(self.iter_executions(workflow_id, status, limit, limit)) as rows:
+            async for e in rows:
+                executions.append(dict(zip(EXECUTION_FIELDS, map(e.get, EXECUTION_KEYS))))
+                if len(executions) >= limit:
+                    break
         
-        return {
-            "executions": [
-                {
-                    "id": e["id"],
-                    "workflow_id": e.get("workflowId"),
-                    "status": e.get("status"),
-                    "started_at": e.get("startedAt"),
-                    "finished_at": e.get("stoppedAt"),
-                }
-                for e in data.get("data", [])
-            ]
-        }
+        return {"executions": executions}
     
     async def get_execution(self, execution_id: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/executions/{execution_id}",
-                headers=self._headers(),
-            )
-            data = resp.json()
+        resp = await self._request("GET", f"/api/v1/executions/{execution_id}")
+        data = loads(resp.content)
         
         return {
             "id": data["id"],
@@ -257,18 +325,19 @@ class N8nTools:
         }
     
     async def trigger_webhook(self, webhook_path: str, method: str = "POST", data: Optional[dict] = None) -> dict:
-        url = f"{self.base_url}/webhook/{webhook_path}"
+        url = f"/webhook/{webhook_path}"
         
-        async with httpx.AsyncClient() as client:
-            if method == "GET":
-                resp = await client.get(url, params=data or {})
-            else:
-                resp = await client.post(url, json=data or {})
-            
-            try:
-                result = resp.json()
-            except:
-                result = {"response": resp.text}
+        client = await self._client()
+        if method == "GET":
+            resp = await client.get(url, params=data or {}, timeout=WEBHOOK_TIMEOUT)
+        else:
+            resp = await client.post(url, json=data or {}, timeout=WEBHOOK_TIMEOUT)
+        
+        # Webhooks answer with whatever the workflow returns; only parse declared JSON
+        if resp.content and "json" in resp.headers.get("content-type", ""):
+            result = loads(resp.content)
+        else:
+            result = {"response": resp.text}
         
         return {
             "status": resp.status_code,
@@ -276,12 +345,8 @@ class N8nTools:
         }
     
     async def list_credentials(self) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/credentials",
-                headers=self._headers(),
-            )
-            data = resp.json()
+        resp = await self._request("GET", "/api/v1/credentials")
+        data = loads(resp.content)
         
         return {
             "credentials": [
@@ -5,10 +5,59 @@ Tools for discovering and using skills (instructions, patterns, agents).
 """
 
 import os
+import re
+import heapq
 import json
+import hashlib
+import functools
+import tempfile
 from pathlib import Path
 from typing import Any, Optional, List
 
+# Generated manifests are persisted here between runs, one file per skills directory
+MANIFEST_CACHE_DIR = Path(
+    os.environ.get("SKILLS_MANIFEST_CACHE_DIR", os.path.join(tempfile.gettempdir(), "devops-mcp-cache"))
+)
+
+# Bytes of each SKILL.md read when extracting its description
+DESCRIPTION_READ_BYTES = 4096
+
+# Task keywords that point skills_recommend at a category (matched against category and skill name)
+RECOMMEND_KEYWORDS = {
+    "documents": ["word", "docx", "document", "report", "letter"],
+    "data": ["excel", "xlsx", "spreadsheet", "csv", "data"],
+    "presentations": ["powerpoint", "pptx", "presentation", "slides"],
+    "pdf": ["pdf", "form", "fill"],
+    "sveltekit": ["svelte", "frontend", "component", "page", "ui"],
+    "postgres": ["database", "sql", "table", "migration", "query"],
+    "n8n": ["workflow", "automation", "webhook", "integration"],
+    "agents": ["autonomous", "agent", "ralph", "automation"],
+}
+
+# Maximum number of recommendations returned by skills_recommend
+RECOMMEND_LIMIT = 5
+
+# One alternation per category, so a task is scanned once per category rather than once per skill and keyword
+_KEYWORD_PATTERNS = {
+    cat: re.compile("|".join(map(re.escape, kws)))
+    for cat, kws in RECOMMEND_KEYWORDS.items()
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _read_skill_file(path: str, mtime_ns: int) -> str:
+    """Read a SKILL.md; mtime_ns is part of the cache key so an edited file is read again."""
+    return Path(path).read_text()
+
+
+def _read_skill(skills_dir: str, skill_path: str) -> str:
+    """Read a skill's SKILL.md, reusing the cached text while the file is unchanged.
+    
+    Raises FileNotFoundError when the skill does not exist; misses are not cached.
+    """
+    path = os.path.join(skills_dir, skill_path, "SKILL.md")
+    return _read_skill_file(path, os.stat(path).st_mtime_ns)
+
 
 class SkillsTools:
     """Skills discovery and management tools."""
@@ -21,15 +70,34 @@ class SkillsTools:
             os.path.expanduser("~/devops-agent/skills"),
             "./skills",
         ]
+        self._skills_dir: Optional[Path] = None
         self._manifest_cache = None
+        # (lowercased "name\ndescription", skill) pairs, built once per manifest for substring search
+        self._search_index: list[tuple[str, dict]] = []
+        # The same pairs bucketed by category
+        self._by_category: dict[str, list[tuple[str, dict]]] = {}
+        # Skill directory name -> path relative to the skills directory, for ids given without a category
+        self._by_short_id: dict[str, str] = {}
     
     def _find_skills_dir(self) -> Optional[Path]:
-        """Find the first valid skills directory."""
+        """Find the first valid skills directory (remembered once found)."""
+        if self._skills_dir is not None:
+            return self._skills_dir
         for path in self.skills_paths:
             if path and Path(path).exists():
-                return Path(path)
+                self._skills_dir = Path(path)
+                return self._skills_dir
         return None
     
+    def invalidate(self) -> None:
+        """Forget the located skills directory and loaded manifest so both are looked up again."""
+        self._skills_dir = None
+        self._manifest_cache = None
+        self._search_index = []
+        self._by_category = {}
+        self._by_short_id = {}
+        _read_skill_file.cache_clear()
+    
     def _load_manifest(self) -> dict:
         """Load or generate skills manifest."""
         if self._manifest_cache:
@@ -39,28 +107,68 @@ class SkillsTools:
         if not skills_dir:
             return {"skills": [], "categories": []}
         
+        self._manifest_cache = self._read_manifest(skills_dir)
+        self._index_manifest(self._manifest_cache)
+        return self._manifest_cache
+    
+    def _index_manifest(self, manifest: dict) -> None:
+        """Build the lookup structures used by the list and search tools."""
+        self._search_index = [
+            (f"{s['name']}\n{s.get('description', '')}".lower(), s)
+            for s in manifest.get("skills", [])
+        ]
+        self._by_category = {}
+        self._by_short_id = {}
+        for entry in self._search_index:
+            skill = entry[1]
+            self._by_category.setdefault(skill["category"], []).append(entry)
+            path = skill.get("path", skill["id"])
+            self._by_short_id.setdefault(os.path.basename(path), path)
+    
+    def _read_manifest(self, skills_dir: Path) -> dict:
+        """Read skills/manifest.json, or generate the manifest from the directory structure."""
         # Check for existing manifest
         manifest_path = skills_dir / "manifest.json"
         if manifest_path.exists():
             with open(manifest_path) as f:
-                self._manifest_cache = json.load(f)
-                return self._manifest_cache
+                return json.load(f)
+        
+        # Reuse the manifest generated by an earlier run while the tree is unchanged
+        signature = self._tree_signature(skills_dir)
+        cache_path = MANIFEST_CACHE_DIR / (
+            "skills-manifest-" + hashlib.blake2b(str(skills_dir.resolve()).encode(), digest_size=8).hexdigest() + ".json"
+        )
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("signature") == signature:
+                return cached["data"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
         
         # Generate manifest from directory structure
         skills = []
         categories = set()
         
-        for category_dir in skills_dir.iterdir():
-            if category_dir.is_dir() and not category_dir.name.startswith("."):
-                categories.add(category_dir.name)
+        # scandir answers is_dir() from the directory listing, without a stat per entry
+        with os.scandir(skills_dir) as categories_it:
+            for category_entry in categories_it:
+                if not category_entry.is_dir() or category_entry.name.startswith("."):
+                    continue
+                category = category_entry.name
+                categories.add(category)
                 
-                for skill_dir in category_dir.iterdir():
-                    if skill_dir.is_dir():
-                        skill_md = skill_dir / "SKILL.md"
-                        if skill_md.exists():
-                            # Parse description from first paragraph
-                            content = skill_md.read_text()
-                            lines = content.split("\n")
+                with os.scandir(category_entry.path) as skills_it:
+                    for skill_entry in skills_it:
+                        if not skill_entry.is_dir():
+                            continue
+                        skill_md = os.path.join(skill_entry.path, "SKILL.md")
+                        if os.path.isfile(skill_md):
+                            # Parse description from first paragraph; it sits near the top,
+                            # so only the head of the file is read
+                            with open(skill_md, "rb") as f:
+                                head = f.read(DESCRIPTION_READ_BYTES)
+                            lines = head.decode("utf-8", "replace").splitlines()
                             description = ""
                             for line in lines[1:]:  # Skip title
                                 if line.strip() and not line.startswith("#"):
@@ -68,18 +176,43 @@ class SkillsTools:
                                     break
                             
                             skills.append({
-                                "id": f"{category_dir.name}/{skill_dir.name}",
-                                "name": skill_dir.name.replace("-", " ").title(),
-                                "category": category_dir.name,
-                                "path": str(skill_dir.relative_to(skills_dir)),
+                                "id": f"{category}/{skill_entry.name}",
+                                "name": skill_entry.name.replace("-", " ").title(),
+                                "category": category,
+                                "path": os.path.join(category, skill_entry.name),
                                 "description": description[:200],
                             })
         
-        self._manifest_cache = {
+        manifest = {
             "skills": skills,
             "categories": sorted(categories),
         }
-        return self._manifest_cache
+        
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            MANIFEST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"signature": signature, "data": manifest}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Cache is best effort; never leave a partial file behind
+            tmp_path.unlink(missing_ok=True)
+        
+        return manifest
+    
+    def _tree_signature(self, skills_dir: Path) -> dict:
+        """Modification times of the skills directory and its category directories.
+        
+        Adding, removing or renaming a skill changes its category's mtime, so a matching
+        signature means the generated manifest is still current (edits inside an existing
+        SKILL.md are not detected).
+        """
+        signature = {".": os.stat(skills_dir).st_mtime_ns}
+        with os.scandir(skills_dir) as it:
+            for entry in it:
+                if entry.is_dir() and not entry.name.startswith("."):
+                    signature[entry.name] = entry.stat().st_mtime_ns
+        return signature
     
     def get_manifest(self) -> dict:
         """Get the skills manifest."""
@@ -91,18 +224,19 @@ class SkillsTools:
         if not skills_dir:
             return f"Skills directory not found"
         
-        skill_path = skills_dir / skill_id / "SKILL.md"
-        if not skill_path.exists():
-            # Try without category prefix
-            for category in skills_dir.iterdir():
-                if category.is_dir():
-                    alt_path = category / skill_id / "SKILL.md"
-                    if alt_path.exists():
-                        skill_path = alt_path
-                        break
+        try:
+            return _read_skill(str(skills_dir), skill_id)
+        except FileNotFoundError:
+            pass
         
-        if skill_path.exists():
-            return skill_path.read_text()
+        # Try without category prefix
+        self._load_manifest()
+        skill_path = self._by_short_id.get(skill_id)
+        if skill_path:
+            try:
+                return _read_skill(str(skills_dir), skill_path)
+            except FileNotFoundError:
+                pass
         
         return f"Skill not found: {skill_id}"
     
@@ -165,17 +299,13 @@ class SkillsTools:
     async def list_skills(self, category: Optional[str] = None, search: Optional[str] = None) -> dict:
         """List available skills."""
         manifest = self._load_manifest()
-        skills = manifest.get("skills", [])
-        
-        if category:
-            skills = [s for s in skills if s["category"] == category]
+        entries = self._by_category.get(category, []) if category else self._search_index
         
         if search:
             search_lower = search.lower()
-            skills = [
-                s for s in skills
-                if search_lower in s["name"].lower() or search_lower in s.get("description", "").lower()
-            ]
+            entries = [entry for entry in entries if search_lower in entry[0]]
+        
+        skills = [s for _, s in entries]
         
         return {
             "skills": skills,
@@ -220,46 +350,53 @@ class SkillsTools:
         
         task_lower = task.lower()
         
-        # Simple keyword matching for recommendations
-        keywords = {
-            "documents": ["word", "docx", "document", "report", "letter"],
-            "data": ["excel", "xlsx", "spreadsheet", "csv", "data"],
-            "presentations": ["powerpoint", "pptx", "presentation", "slides"],
-            "pdf": ["pdf", "form", "fill"],
-            "sveltekit": ["svelte", "frontend", "component", "page", "ui"],
-            "postgres": ["database", "sql", "table", "migration", "query"],
-            "n8n": ["workflow", "automation", "webhook", "integration"],
-            "agents": ["autonomous", "agent", "ralph", "automation"],
-        }
+        # Simple keyword matching for recommendations: find the categories the task mentions once
+        keyword_hits = {}
+        for cat, pattern in _KEYWORD_PATTERNS.items():
+            match = pattern.search(task_lower)
+            if match:
+                keyword_hits[cat] = match.group()
         
-        recommended = []
-        for skill in skills:
+        # Bounded min-heap of (score, -position, skill, reason); keyword hits outrank description
+        # matches and ties keep manifest order, so the root is always the weakest recommendation
+        top = []
+        seen_ids = set()
+        task_words = [word for word in task_lower.split() if len(word) > 3]
+        for position, skill in enumerate(skills):
+            if skill["id"] in seen_ids:
+                continue
             skill_cat = skill["category"]
             skill_name = skill["name"].lower()
-            skill_desc = skill.get("description", "").lower()
             
+            reason = None
             # Check if task matches any keywords for this skill's category
-            for cat, kws in keywords.items():
+            for cat, kw in keyword_hits.items():
                 if cat in skill_cat or cat in skill_name:
-                    for kw in kws:
-                        if kw in task_lower:
-                            recommended.append({
-                                **skill,
-                                "match_reason": f"Task mentions '{kw}'",
-                            })
-                            break
+                    score, reason = 2, f"Task mentions '{kw}'"
+                    break
             
             # Also check if task words appear in skill description
-            for word in task_lower.split():
-                if len(word) > 3 and word in skill_desc:
-                    if skill not in [r for r in recommended if r["id"] == skill["id"]]:
-                        recommended.append({
-                            **skill,
-                            "match_reason": f"Description contains '{word}'",
-                        })
+            if reason is None:
+                skill_desc = skill.get("description", "").lower()
+                for word in task_words:
+                    if word in skill_desc:
+                        score, reason = 1, f"Description contains '{word}'"
+                        break
+            
+            if reason is None:
+                continue
+            seen_ids.add(skill["id"])
+            entry = (score, -position, skill, reason)
+            if len(top) < RECOMMEND_LIMIT:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
         
         return {
             "task": task,
-            "recommendations": recommended[:5],  # Top 5
-            "count": len(recommended),
+            "recommendations": [
+                {**skill, "match_reason": reason}
+                for _, _, skill, reason in sorted(top, key=lambda e: e[:2], reverse=True)
+            ],
+            "count": len(seen_ids),
         }
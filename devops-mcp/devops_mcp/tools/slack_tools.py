@@ -5,8 +5,24 @@ Tools for sending Slack notifications and managing channels.
 """
 
 import os
+import asyncio
+import importlib.util
 import httpx
-from typing import Any, Optional, List
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Optional, List
+
+# Multiplex concurrent requests over one connection when h2 is installed (devops-mcp[perf])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Client-wide timeouts; file uploads get UPLOAD_TIMEOUT so large files can finish sending
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+UPLOAD_TIMEOUT = httpx.Timeout(10.0, connect=5.0, write=300.0)
+
+# Largest page requested from cursor-paginated Slack methods (Slack recommends at most 200)
+MAX_PAGE_SIZE = 200
+
+# Emoji prefixed to deployment notifications, by status
+DEPLOY_EMOJI = {"started": "🚀", "success": "✅", "failed": "❌"}
 
 
 class SlackTools:
@@ -16,6 +32,7 @@ class SlackTools:
         self.token = os.environ.get("SLACK_BOT_TOKEN")
         self.webhook_url = os.environ.get("SLACK_WEBHOOK_URL")
         self.base_url = "https://slack.com/api"
+        self._http: Optional[httpx.AsyncClient] = None
     
     def is_configured(self) -> bool:
         return bool(self.token or self.webhook_url)
@@ -23,6 +40,65 @@ class SlackTools:
     def _headers(self):
         return {"Authorization": f"Bearer {self.token}"}
     
+    async def _client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for the Slack API and webhooks (created on first use)."""
+        if self._http is None or self._http.is_closed:
+            # The token is sent per API request, so webhook posts through the same pool never carry it
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300),
+                timeout=DEFAULT_TIMEOUT,
+                http2=HTTP2,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _pages(
+        self,
+        path: str,
+        params: dict,
+        key: str,
+        limit: int,
+        keep: Optional[Callable[[dict], bool]] = None,
+    ) -> AsyncIterator[list]:
+        """Yield the items of a cursor-paginated Slack method page by page.
+        
+        Only items passing keep (all items when None) are yielded and counted. The next
+        page is requested while the caller consumes the current one, until limit items
+        have been yielded or Slack returns no next_cursor.
+        """
+        client = await self._client()
+        params = {**params, "limit": min(limit, MAX_PAGE_SIZE)}
+        
+        async def fetch(cursor: Optional[str]) -> dict:
+            resp = await client.get(
+                path,
+                headers=self._headers(),
+                params={**params, "cursor": cursor} if cursor else params,
+            )
+            return resp.json()
+        
+        pending = asyncio.ensure_future(fetch(None))
+        seen = 0
+        try:
+            while pending is not None:
+                data = await pending
+                page = data.get(key, [])
+                if keep is not None:
+                    page = [item for item in page if keep(item)]
+                seen += len(page)
+                cursor = data.get("response_metadata", {}).get("next_cursor")
+                pending = asyncio.ensure_future(fetch(cursor)) if cursor and seen < limit else None
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
     def get_tools(self) -> dict[str, dict]:
         return {
             "slack_send_message": {
@@ -58,7 +134,7 @@ class SlackTools:
                     "type": "object",
                     "properties": {
                         "types": {"type": "string", "description": "Channel types (public_channel,private_channel)", "default": "public_channel"},
-                        "limit": {"type": "integer", "default": 100},
+                        "limit": {"type": "integer", "description": "Maximum channels to return (pages are followed)", "default": 100},
                     },
                 },
                 "handler": self.list_channels,
@@ -80,7 +156,7 @@ class SlackTools:
                 "input_schema": {
                     "type": "object",
                     "properties": {
-                        "limit": {"type": "integer", "default": 100},
+                        "limit": {"type": "integer", "description": "Maximum users to return (pages are followed)", "default": 100},
                     },
                 },
                 "handler": self.list_users,
@@ -147,13 +223,13 @@ class SlackTools:
         if thread_ts:
             body["thread_ts"] = thread_ts
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{self.base_url}/chat.postMessage",
-                headers=self._headers(),
-                json=body,
-            )
-            data = resp.json()
+        client = await self._client()
+        resp = await client.post(
+            "/chat.postMessage",
+            headers=self._headers(),
+            json=body,
+        )
+        data = resp.json()
         
         return {
             "ok": data.get("ok"),
@@ -176,8 +252,8 @@ class SlackTools:
         if blocks:
             body["blocks"] = blocks
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, json=body)
+        client = await self._client()
+        resp = await client.post(url, json=body)
         
         return {
             "status": resp.status_code,
@@ -185,34 +261,29 @@ class SlackTools:
         }
     
     async def list_channels(self, types: str = "public_channel", limit: int = 100) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/conversations.list",
-                headers=self._headers(),
-                params={"types": types, "limit": limit},
-            )
-            data = resp.json()
+        channels = []
+        async with aclosing(self._pages("/conversations.list", {"types": types}, "channels", limit)) as pages:
+            async for page in pages:
+                channels.extend(
+                    {
+                        "id": c["id"],
+                        "name": c["name"],
+                        "is_private": c.get("is_private", False),
+                        "num_members": c.get("num_members", 0),
+                    }
+                    for c in page
+                )
         
-        return {
-            "channels": [
-                {
-                    "id": c["id"],
-                    "name": c["name"],
-                    "is_private": c.get("is_private", False),
-                    "num_members": c.get("num_members", 0),
-                }
-                for c in data.get("channels", [])
-            ]
-        }
+        return {"channels": channels[:limit]}
     
     async def get_channel_history(self, channel: str, limit: int = 20) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/conversations.history",
-                headers=self._headers(),
-                params={"channel": channel, "limit": limit},
-            )
-            data = resp.json()
+        client = await self._client()
+        resp = await client.get(
+            "/conversations.history",
+            headers=self._headers(),
+            params={"channel": channel, "limit": limit},
+        )
+        data = resp.json()
         
         return {
             "messages": [
@@ -227,39 +298,35 @@ class SlackTools:
         }
     
     async def list_users(self, limit: int = 100) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.base_url}/users.list",
-                headers=self._headers(),
-                params={"limit": limit},
-            )
-            data = resp.json()
+        users = []
+        # Deleted members are skipped inside _pages so they don't count towards limit
+        pages = self._pages("/users.list", {}, "members", limit, keep=lambda u: not u.get("deleted"))
+        async with aclosing(pages) as pages:
+            async for page in pages:
+                users.extend(
+                    {
+                        "id": u["id"],
+                        "name": u.get("name"),
+                        "real_name": u.get("real_name"),
+                        "is_bot": u.get("is_bot", False),
+                    }
+                    for u in page
+                )
         
-        return {
-            "users": [
-                {
-                    "id": u["id"],
-                    "name": u.get("name"),
-                    "real_name": u.get("real_name"),
-                    "is_bot": u.get("is_bot", False),
-                }
-                for u in data.get("members", [])
-                if not u.get("deleted")
-            ]
-        }
+        return {"users": users[:limit]}
     
     async def add_reaction(self, channel: str, timestamp: str, emoji: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{self.base_url}/reactions.add",
-                headers=self._headers(),
-                json={
-                    "channel": channel,
-                    "timestamp": timestamp,
-                    "name": emoji,
-                },
-            )
-            data = resp.json()
+        client = await self._client()
+        resp = await client.post(
+            "/reactions.add",
+            headers=self._headers(),
+            json={
+                "channel": channel,
+                "timestamp": timestamp,
+                "name": emoji,
+            },
+        )
+        data = resp.json()
         
         return {"ok": data.get("ok"), "error": data.get("error")}
     
@@ -270,9 +337,6 @@ class SlackTools:
         title: Optional[str] = None,
         initial_comment: Optional[str] = None,
     ) -> dict:
-        with open(file_path, "rb") as f:
-            file_content = f.read()
-        
         data = {
             "channels": channels,
             "filename": os.path.basename(file_path),
@@ -282,14 +346,17 @@ class SlackTools:
         if initial_comment:
             data["initial_comment"] = initial_comment
         
-        async with httpx.AsyncClient() as client:
+        client = await self._client()
+        # httpx streams the open file into the multipart body in chunks rather than holding it in memory
+        with open(file_path, "rb") as f:
             resp = await client.post(
-                f"{self.base_url}/files.upload",
+                "/files.upload",
                 headers=self._headers(),
                 data=data,
-                files={"file": file_content},
+                files={"file": (data["filename"], f, "application/octet-stream")},
+                timeout=UPLOAD_TIMEOUT,
             )
-            result = resp.json()
+        result = resp.json()
         
         return {
             "ok": result.get("ok"),
@@ -307,8 +374,7 @@ class SlackTools:
         commit: Optional[str] = None,
         author: Optional[str] = None,
     ) -> dict:
-        emoji = {"started": "🚀", "success": "✅", "failed": "❌"}.get(status, "📦")
-        color = {"started": "#2196F3", "success": "#36a64f", "failed": "#ff0000"}.get(status, "#808080")
+        emoji = DEPLOY_EMOJI.get(status, "📦")
         
         blocks = [
             {
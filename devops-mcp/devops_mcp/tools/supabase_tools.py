@@ -141,6 +141,7 @@ class SupabaseTools:
                     },
                 },
                 "handler": self.list_tables,
+                "cache_ttl": 300,
             },
             "supabase_table_schema": {
                 "description": "Get schema/columns for a table",
@@ -152,6 +153,7 @@ class SupabaseTools:
                     "required": ["table"],
                 },
                 "handler": self.get_table_schema,
+                "cache_ttl": 300,
             },
             "supabase_run_sql": {
                 "description": "Run raw SQL query (use with caution)",
@@ -37,6 +37,7 @@ class VercelTools:
                     },
                 },
                 "handler": self.list_projects,
+                "cache_ttl": 60,
             },
             "vercel_deployment_list": {
                 "description": "List deployments for a project",